@@ -0,0 +1,205 @@
+# core/artifacts.py
+import gzip
+import hashlib
+import io
+import os
+import shutil
+from pathlib import Path
+from .utils import logger
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖：未安装时仅支持 gzip
+    zstandard = None
+
+COMPRESSED_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+_SUFFIX_FOR = {"gzip": ".gz", "zstd": ".zst"}
+STORE_DIR_NAME = ".store"
+
+_settings = {
+    "compression": "none",   # none / gzip / zstd
+    "dedup": True,           # 相同内容的产物硬链接到同一份对象
+    "link_results": True,    # 结果目录用硬链接代替复制
+    "store_dir": None,
+}
+
+
+def configure(config: dict):
+    """从 config.yaml 的 artifacts 段加载设置（缺省时保持旧行为：不压缩）"""
+    art_cfg = config.get("artifacts") or {}
+    compression = str(art_cfg.get("compression", "none")).lower()
+    if compression == "zstd" and zstandard is None:
+        logger.warning("⚠️  未安装 zstandard，产物压缩改用 gzip（pip install zstandard 可启用 zstd）")
+        compression = "gzip"
+    if compression not in ("none", "gzip", "zstd"):
+        logger.warning(f"⚠️  未知压缩方式 '{compression}'，已关闭压缩")
+        compression = "none"
+    _settings["compression"] = compression
+    _settings["dedup"] = bool(art_cfg.get("dedup", True))
+    _settings["link_results"] = bool(art_cfg.get("link_results", True))
+    logs_dir = Path((config.get("output") or {}).get("logs_dir", "./logs")).resolve()
+    _settings["store_dir"] = logs_dir / STORE_DIR_NAME
+    prune_store()
+
+
+def prune_store() -> int:
+    """
+    清理对象库：链接数为 1 的对象已没有任何任务目录引用（旧日志被删除），删掉才能真正释放空间。
+    返回删除的对象数。
+    """
+    store_dir = _settings["store_dir"]
+    if store_dir is None or not store_dir.is_dir():
+        return 0
+    removed, freed = 0, 0
+    for prefix in os.scandir(store_dir):
+        if not prefix.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(prefix.path):
+            try:
+                st = entry.stat(follow_symlinks=False)
+                if st.st_nlink == 1:
+                    os.unlink(entry.path)
+                    removed += 1
+                    freed += st.st_size
+            except OSError:
+                continue
+        try:
+            os.rmdir(prefix.path)  # 只有空目录会成功
+        except OSError:
+            pass
+    if removed:
+        logger.info(f"🧹 对象库已清理 {removed} 个无引用对象（释放 {freed / 1024 / 1024:.1f} MB）")
+    return removed
+
+
+def compression_of(path: Path):
+    """按扩展名判断压缩格式，未压缩返回 None"""
+    return COMPRESSED_SUFFIXES.get(Path(path).suffix.lower())
+
+
+def logical_suffix(path: Path) -> str:
+    """去掉压缩扩展名后的格式后缀：x.txt.gz -> .txt"""
+    path = Path(path)
+    if compression_of(path):
+        path = path.with_suffix("")
+    return path.suffix.lower()
+
+
+def open_text(path: Path):
+    """以文本方式打开产物，自动识别 gzip / zstd"""
+    kind = compression_of(path)
+    if kind == "gzip":
+        return gzip.open(path, 'rt', encoding='utf-8', errors='ignore')
+    if kind == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"读取 {Path(path).name} 需要 zstandard 模块")
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8', errors='ignore')
+    return open(path, 'r', encoding='utf-8', errors='ignore')
+
+
+def open_binary(path: Path):
+    """以二进制流打开产物（已解压），供按块扫描使用"""
+    kind = compression_of(path)
+    if kind == "gzip":
+        return gzip.open(path, 'rb')
+    if kind == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"读取 {Path(path).name} 需要 zstandard 模块")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    return open(path, 'rb')
+
+
+def release(path: Path) -> Path:
+    """
+    写入产物前调用：同名文件可能是对象库中某个对象的硬链接（任务目录按分钟命名，或未按任务归档时共用目录），
+    原地截断会连带改写对象库与其他任务的同一份内容。先删除目录项，之后的写入总是落在新 inode 上。
+    """
+    try:
+        Path(path).unlink()
+    except FileNotFoundError:
+        pass
+    return path
+
+
+def _compress(path: Path, kind: str) -> Path:
+    """压缩并删除原文件；gzip 头不写时间戳与文件名，保证相同内容得到相同字节"""
+    dst = path.with_name(path.name + _SUFFIX_FOR[kind])
+    # 先写临时文件再替换：dst 可能是已去重的硬链接，不能原地打开
+    tmp = dst.with_name(dst.name + ".tmp")
+    with open(path, 'rb') as src, open(tmp, 'wb') as raw_out:
+        if kind == "gzip":
+            with gzip.GzipFile(filename='', fileobj=raw_out, mode='wb', mtime=0) as out:
+                shutil.copyfileobj(src, out, 1024 * 1024)
+        else:
+            zstandard.ZstdCompressor(level=10).copy_stream(src, raw_out)
+    shutil.copystat(path, tmp)
+    os.replace(tmp, dst)
+    path.unlink()
+    return dst
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _dedup(path: Path):
+    """按内容哈希登记到对象库：已存在则把 path 换成指向同一对象的硬链接"""
+    store_dir = _settings["store_dir"]
+    if store_dir is None:
+        return
+    digest = _sha256(path)
+    obj = store_dir / digest[:2] / (digest + "".join(path.suffixes[-1:]))
+    try:
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        if obj.exists():
+            if os.path.samefile(obj, path):
+                return
+            tmp = path.with_name(path.name + ".link")
+            os.link(obj, tmp)
+            os.replace(tmp, path)
+            logger.debug(f"♻️  产物与历史内容相同，已硬链接: {path.name}")
+        else:
+            os.link(path, obj)
+    except OSError as e:
+        # 跨设备 / 文件系统不支持硬链接：保留独立文件即可
+        logger.debug(f"产物去重跳过 {path.name}: {e}")
+
+
+def store_artifact(path: Path, compress: bool = True) -> Path:
+    """
+    登记一份中间产物（工具原始输出等）：按配置压缩并按内容去重。
+    compress=False 用于需保持明文的交付物（如合并结果）。
+    返回最终路径（压缩后扩展名会变化），失败时原样返回。
+    """
+    path = Path(path)
+    if not path.is_file():
+        return path
+    try:
+        kind = _settings["compression"]
+        if compress and kind != "none" and compression_of(path) is None and path.stat().st_size > 0:
+            path = _compress(path, kind)
+        if _settings["dedup"]:
+            _dedup(path)
+    except Exception as e:
+        logger.warning(f"⚠️  产物压缩/去重失败 {path.name}: {e}")
+    return path
+
+
+def link_or_copy(src: Path, dst: Path):
+    """优先硬链接，跨设备或不支持时退回复制"""
+    if dst.exists():
+        if os.path.samefile(src, dst):
+            return
+        dst.unlink()
+    if _settings["link_results"]:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
@@ -0,0 +1,145 @@
+# core/checkpoint.py
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from .utils import logger
+
+MANIFEST_NAME = "manifest.json"
+TARGETS_NAME = "targets.txt"
+
+# 主流程阶段（按执行顺序）
+STAGES = ("enumeration", "merge", "dns")
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class RunManifest:
+    """
+    任务清单：记录每个工具 / 阶段的完成状态与产物路径，保存在日志任务目录下。
+    每次状态变化立即落盘（先写临时文件再原子替换），进程被杀也不会留下半截 JSON。
+    """
+
+    def __init__(self, path: Path, data: dict):
+        self.path = path
+        self.data = data
+
+    # ---------- 创建 / 加载 ----------
+    @classmethod
+    def create(cls, log_dir: Path, result_dir: Path, input_identifier: str,
+               target_file: Path, is_single_domain: bool, selected_tools: list):
+        # 目标文件复制进任务目录：-t 模式的临时文件在退出时会被清理，续跑时需要它
+        saved_targets = log_dir / TARGETS_NAME
+        if Path(target_file).resolve() != saved_targets.resolve():
+            shutil.copyfile(target_file, saved_targets)
+        data = {
+            "version": 1,
+            "input_identifier": input_identifier,
+            "log_dir": str(log_dir),
+            "result_dir": str(result_dir),
+            "target_file": str(saved_targets),
+            "is_single_domain": is_single_domain,
+            "selected_tools": list(selected_tools),
+            "tools": {},
+            "stages": {},
+            "status": "running",
+            "created": _now(),
+            "updated": _now(),
+        }
+        manifest = cls(log_dir / MANIFEST_NAME, data)
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, task_dir: Path):
+        path = Path(task_dir).expanduser().resolve() / MANIFEST_NAME
+        if not path.is_file():
+            raise FileNotFoundError(f"任务清单不存在: {path}")
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(path, data)
+
+    def save(self):
+        self.data["updated"] = _now()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+    # ---------- 基本信息 ----------
+    @property
+    def input_identifier(self) -> str:
+        return self.data["input_identifier"]
+
+    @property
+    def log_dir(self) -> Path:
+        return Path(self.data["log_dir"])
+
+    @property
+    def result_dir(self) -> Path:
+        return Path(self.data["result_dir"])
+
+    @property
+    def target_file(self) -> Path:
+        return Path(self.data["target_file"])
+
+    @property
+    def is_single_domain(self) -> bool:
+        return self.data.get("is_single_domain", False)
+
+    @property
+    def selected_tools(self) -> list:
+        return self.data.get("selected_tools", [])
+
+    # ---------- 工具 ----------
+    def tool_output(self, tool_name: str):
+        """已成功工具的输出路径；未完成、失败或产物丢失时返回 None"""
+        entry = self.data["tools"].get(tool_name)
+        if not entry or entry.get("status") != "done":
+            return None
+        output = Path(entry["output"])
+        return output if output.exists() else None
+
+    def mark_tool(self, tool_name: str, output_path, elapsed: float = None):
+        entry = {"status": "done" if output_path is not None else "failed", "finished": _now()}
+        if output_path is not None:
+            entry["output"] = str(output_path)
+        if elapsed is not None:
+            entry["elapsed"] = round(elapsed, 1)
+        self.data["tools"][tool_name] = entry
+        self.save()
+
+    # ---------- 阶段 ----------
+    def stage_done(self, stage: str) -> bool:
+        """阶段已完成且登记的产物文件全部存在"""
+        entry = self.data["stages"].get(stage)
+        if not entry or entry.get("status") != "done":
+            return False
+        return all(Path(p).exists() for p in entry.get("artifacts", {}).values())
+
+    def stage_artifact(self, stage: str, key: str):
+        entry = self.data["stages"].get(stage) or {}
+        value = entry.get("artifacts", {}).get(key)
+        return Path(value) if value else None
+
+    def mark_stage(self, stage: str, **artifacts):
+        self.data["stages"][stage] = {
+            "status": "done",
+            "finished": _now(),
+            "artifacts": {k: str(v) for k, v in artifacts.items() if v is not None},
+        }
+        self.save()
+
+    def first_unfinished_stage(self):
+        for stage in STAGES:
+            if not self.stage_done(stage):
+                return stage
+        return None
+
+    def mark_completed(self):
+        self.data["status"] = "completed"
+        self.save()
+        logger.debug(f"任务清单已更新: {self.path}")
@@ -40,14 +40,18 @@ def _get_default_config_for_os():
     # amass 特殊处理：若在 PATH 中，直接写 "amass"；否则需指定路径
     amass_path = "amass"  # 默认假设已加入 PATH（跨平台通用）
 
-    # DNS 解析命令：Windows 不支持 ">" 重定向（但 dnsx 支持 -o），所以统一用 dnsx 自带输出
+    # DNS 解析命令：待解析名字经 stdin 传入，结果以 JSON 行从 stdout 读取（缺少 -json 时自动追加）
     if is_windows:
-        dns_cmd = ".\\toolList\\dnsx\\dnsx.exe -a -cname -resp -retry 4 -t 80 -nc"
+        dns_cmd = ".\\toolList\\dnsx\\dnsx.exe -a -cname -json -retry 4 -t 80 -silent"
     else:
-        dns_cmd = "./toolList/dnsx/dnsx -a -cname -resp -retry 4 -t 80 -nc"
+        dns_cmd = "./toolList/dnsx/dnsx -a -cname -json -retry 4 -t 80 -silent"
 
     config_template = f'''# config.yaml - 子域名收集配置 v1.7+（自动适配 {platform.system()} 系统）
 # subdomain_enumerators: 用户可选的子域名枚举工具（支持多选）
+# parser（可选）: 输出解析器。默认按工具名选用专用解析器（oneforall / subfinder / amass / findomain / ksubdomain / assetfinder），
+#                 其他工具走通用解析（.txt 取每行首个 token，.csv 自动识别列）；自定义工具可指定 lines / generic 等
+# command 可用变量: {{tool_path}} {{target_file}} {{output_file}}，以及 {{resolvers}}（--bench-resolvers 生成的健康解析器文件，
+#                 如 ksubdomain 追加 "-r {{resolvers}}"；文件不存在时该工具会被跳过）
 
 subdomain_enumerators:
   oneforall:
@@ -86,8 +90,96 @@ subdomain_enumerators:
     output_suffix: ".txt"
     description: "极快轻量，结果少；依赖API，适合初步侦察｜通用"
 
+# 进程内 Python 插件枚举器：共享一个事件循环与 HTTP 连接池，结果直接并入合并集合
+# entry 格式为 "模块路径:协程函数"；rate_limit 为每秒请求数，可用 base_url 指向自建镜像
+plugin_enumerators:
+  crtsh:
+    entry: "core.sources.crtsh:enumerate"
+    rate_limit: 1
+    timeout: 60
+    description: "证书透明日志，免 API、无需进程；适合快速补充｜通用"
+
+  wayback:
+    entry: "core.sources.wayback:enumerate"
+    rate_limit: 1
+    timeout: 60
+    description: "Wayback Machine 历史 URL，免 API；可发现已下线资产｜国外"
+
 dns_resolution:
+  # 需要更完整的数据时可追加 -aaaa -mx -txt -ns -ptr -soa 等记录类型；追加 "-r {{resolvers}}" 使用健康解析器文件
   command: "{dns_cmd}"
+  timeout: 300                   # 单次 dnsx 调用的超时（秒）；自适应模式下为每批
+  # 自适应并发：分批解析，按每批超时 / SERVFAIL / REFUSED 比例 AIMD 调整 -t（初值取 command 中的 -t），失败的名字重新排队
+  adaptive:
+    enabled: true
+    batch_size: 20000
+    min_concurrency: 10
+    max_concurrency: 500
+    increase: 20                 # 失败率不超过阈值时每批 +20
+    decrease: 0.5                # 超过阈值时 ×0.5
+    error_threshold: 0.05
+    max_attempts: 3              # 每个名字最多尝试次数
+
+# 解析器测速（--bench-resolvers）：测量候选解析器的延迟 / 错误率，用金丝雀名字校验应答是否被污染，
+# 用随机不存在的名字检测 NXDOMAIN 劫持，按健康度排序写入 output，命令模板中以 {{resolvers}} 引用
+resolvers:
+  candidates: ./resolvers.txt            # 候选列表，每行一个 IP 或 IP:端口（# 注释）
+  output: ./resolvers.ranked.txt         # 健康度排序后的解析器文件（同目录另写 .report.tsv 测速明细）
+  auto_bench: false                      # 扫描前自动测速（output 不存在或超过 max_age 时）
+  max_age: 24h
+  keep: 50                               # 最多保留的解析器个数（0 为全部健康解析器）
+  rounds: 3                              # 每个金丝雀名字的查询轮数
+  timeout: 2                             # 单次查询超时（秒）
+  concurrency: 200                       # 同时测速的解析器个数
+  max_error_rate: 0.2                    # 超时 + SERVFAIL / REFUSED 比例超过该值即剔除
+  canaries:                              # 应答固定的名字=预期地址，应答不在其中即视为污染
+    - "one.one.one.one=1.1.1.1,1.0.0.1"
+    - "dns.google=8.8.8.8,8.8.4.4"
+  nx_domains: ["example.com"]            # 在其下查询随机名字，返回地址即视为 NXDOMAIN 劫持
+
+# 排列组合（可选，也可用 --permute 临时开启）：基于合并结果生成候选（插入词 / 数字增减 / 词替换），分批交给 dnsx 解析
+permutation:
+  enabled: false
+  wordlist: ""                 # 每行一个词，留空使用内置词表
+  number_span: 3               # 数字增减范围：api2 -> api1 ~ api5
+  max_candidates: 5000000      # 单次任务最多尝试的候选数（0 为不限）
+  batch_size: 50000            # 每批交给 dnsx 的候选数
+  memory_mb: 32                # 布隆过滤器内存预算（历史与本次任务各占一份）
+  persist: true                # 过滤器保存到 logs_dir/.permutation.bloom，跨任务不重复尝试
+  wildcard_threshold: 20       # 同一根域下超过该数量的候选解析到相同地址时视为泛解析并丢弃
+
+# IP / 网段聚合：DNS 结果生成 By IP / By Network / By Host sheet，并输出非 CDN 主机清单（*_non_cdn.txt）
+networks:
+  enabled: true
+  cidr_lists: []               # 本地 CIDR 列表（每行一个 CIDR），命中 cdn: true 的列表即标记为 CDN，例如:
+  #  - name: cloudflare
+  #    path: ./data/cloudflare.txt
+  #    cdn: true
+  asn_db: ""                   # 可选：离线 ASN 库（iptoasn.com 的 ip2asn-v4.tsv 等 TSV 文件）
+
+# HTTP 存活探测（可选，也可用 --probe 临时开启）：DNS 清洗后并发探测可达主机，结果写入报告 HTTP sheet 与 *_http.txt
+http_probe:
+  enabled: false
+  ports: [80, 443, 8080, 8443]   # 也可写 "https:8000" / "http:8443" 指定协议
+  concurrency: 200
+  timeout: 5                     # 单个请求超时（秒）
+  max_body: 65536                # 每个响应最多读取的字节数（只用于提取标题）
+
+# 范围过滤：仅保留 -t/-T 目标根域下的子域名（CDN、邮件服务商等第三方域名另存至日志目录）
+scope:
+  enabled: true
+  minimize_targets: true       # -T 列表中已被上级根域覆盖的目标（如 dev.example.com）不再单独交给工具枚举
+
+# 中间产物：日志目录中的工具原始输出压缩保存，相同内容按哈希硬链接去重（logs_dir/.store）
+artifacts:
+  compression: gzip            # none / gzip / zstd（zstd 需 pip install zstandard）
+  dedup: true                  # 相同内容硬链接到 logs_dir/.store；删除旧任务日志后，下次运行时清理无引用对象
+  link_results: true           # 结果目录使用硬链接代替复制
+
+# 资产库（可选）：合并与 DNS 结果写入 SQLite，跨任务查询（python3 s1hua.py --query growth 7d）
+inventory:
+  enabled: false
+  path: "./inventory.db"
 
 # ========== 新版输出配置（推荐使用） ==========
 output:
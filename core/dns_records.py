@@ -0,0 +1,143 @@
+# core/dns_records.py
+import json
+from array import array
+
+# dnsx JSON 字段名 -> 记录类型（按报告中的 sheet 顺序）
+JSON_FIELDS = {
+    "a": "A",
+    "aaaa": "AAAA",
+    "cname": "CNAME",
+    "mx": "MX",
+    "txt": "TXT",
+    "ns": "NS",
+    "ptr": "PTR",
+    "soa": "SOA",
+    "srv": "SRV",
+    "caa": "CAA",
+}
+RECORD_TYPES = tuple(JSON_FIELDS.values())
+ADDRESS_TYPES = ("A", "AAAA")
+
+
+class _Column:
+    """单一记录类型的列式存储：主机编号 / 值 / TTL / 在应答中的位置（CNAME 链顺序）"""
+
+    __slots__ = ("host_ids", "values", "ttls", "positions")
+
+    def __init__(self):
+        self.host_ids = array('I')
+        self.values = []
+        self.ttls = array('I')
+        self.positions = array('H')
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _soa_value(item) -> str:
+    """SOA 在不同 dnsx 版本中为字符串或对象，统一成 'ns mailbox serial refresh retry expire minttl'"""
+    if isinstance(item, dict):
+        keys = ("ns", "mailbox", "serial", "refresh", "retry", "expire", "minttl")
+        return " ".join(str(item[k]) for k in keys if k in item)
+    return str(item)
+
+
+class RecordStore:
+    """
+    DNS 解析结果的紧凑存储：主机名只存一份（按编号引用），重复的值（CDN IP 等）共享同一字符串对象，
+    每种记录类型一组平行数组，避免为每条记录创建元组。
+    """
+
+    def __init__(self):
+        self.hosts = []
+        self._host_ids = {}
+        self._strings = {}
+        self.columns = {rtype: _Column() for rtype in RECORD_TYPES}
+        # 每个主机的应答状态（NOERROR / NXDOMAIN / SERVFAIL ...）
+        self.status = {}
+        # 多次尝试仍超时 / 出错而放弃的名字（自适应解析填写，没有确定应答）
+        self.given_up = set()
+
+    def __len__(self):
+        return sum(len(col) for col in self.columns.values())
+
+    def host_id(self, host: str) -> int:
+        hid = self._host_ids.get(host)
+        if hid is None:
+            hid = len(self.hosts)
+            self._host_ids[host] = hid
+            self.hosts.append(host)
+        return hid
+
+    def add(self, host: str, rtype: str, value: str, ttl: int = 0, position: int = 0):
+        col = self.columns[rtype]
+        col.host_ids.append(self.host_id(host))
+        col.values.append(self._strings.setdefault(value, value))
+        col.ttls.append(max(0, min(int(ttl or 0), 0xFFFFFFFF)))
+        col.positions.append(min(position, 0xFFFF))
+
+    def ingest_json_line(self, line: str) -> bool:
+        """解析一行 dnsx -json 输出，非 JSON 行返回 False"""
+        line = line.strip()
+        if not line.startswith('{'):
+            return False
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return False
+        host = str(obj.get("host", "")).strip().lower().rstrip('.')
+        if not host:
+            return False
+        hid = self.host_id(host)
+        status = obj.get("status_code")
+        if status:
+            self.status[hid] = self._strings.setdefault(status, status)
+        ttl = obj.get("ttl", 0)
+        for field, rtype in JSON_FIELDS.items():
+            answers = obj.get(field)
+            if not answers:
+                continue
+            if not isinstance(answers, list):
+                answers = [answers]
+            for pos, item in enumerate(answers):
+                value = _soa_value(item) if rtype == "SOA" else str(item)
+                if rtype != "TXT":
+                    value = value.rstrip('.')
+                self.add(host, rtype, value, ttl, pos)
+        return True
+
+    def count(self, rtype: str) -> int:
+        return len(self.columns[rtype])
+
+    def rows(self, rtype: str):
+        """按写入顺序迭代 (host, value, ttl, position)"""
+        col = self.columns[rtype]
+        hosts = self.hosts
+        for hid, value, ttl, pos in zip(col.host_ids, col.values, col.ttls, col.positions):
+            yield hosts[hid], value, ttl, pos
+
+    def iter_records(self):
+        """(host, rtype, value) 迭代器，供资产库等下游写入"""
+        for rtype in RECORD_TYPES:
+            for host, value, _, _ in self.rows(rtype):
+                yield host, rtype, value
+
+    def resolved_hosts(self) -> set:
+        """拥有 A/AAAA 记录的主机（可探测目标）"""
+        hosts = self.hosts
+        return {hosts[hid] for rtype in ADDRESS_TYPES for hid in self.columns[rtype].host_ids}
+
+    def hosts_with_status(self, *codes) -> set:
+        hosts = self.hosts
+        return {hosts[hid] for hid, code in self.status.items() if code in codes}
+
+    def extend(self, other: "RecordStore", hosts: set = None):
+        """并入另一份结果（如分批解析、排列组合阶段的命中）；给定 hosts 时只并入这些主机"""
+        for rtype in RECORD_TYPES:
+            for host, value, ttl, pos in other.rows(rtype):
+                if hosts is None or host in hosts:
+                    self.add(host, rtype, value, ttl, pos)
+        for hid, code in other.status.items():
+            host = other.hosts[hid]
+            if hosts is None or host in hosts:
+                self.status[self.host_id(host)] = code
@@ -1,125 +1,370 @@
 # core/dns_resolver.py
-import subprocess
+import json
+import os
 import re
+import subprocess
+import threading
+import time
+from collections import deque
 from pathlib import Path
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill
 from .utils import logger
+from .artifacts import open_text
+from .dns_records import RecordStore, RECORD_TYPES
+from .progress import progress
+from .resolvers import expand_template as expand_resolvers
+
+_JSON_FLAG_RE = re.compile(r'(^|\s)-(json|j)(\s|$)')
+_THREADS_RE = re.compile(r'(^|\s)-t\s+(\d+)(?=\s|$)')
+_RCODE_FLAG_RE = re.compile(r'(^|\s)-(rcode|rc)(\s|$)')
+
+# 自适应模式下需要 dnsx 输出每个名字的应答状态，才能区分「无记录」与「超时 / 出错」
+ADAPTIVE_RCODES = "noerror,nxdomain,servfail,refused"
+ERROR_RCODES = ("SERVFAIL", "REFUSED")
 
+# 各记录类型的 sheet 表头与列宽（TTL 统一放在最后一列）
+SHEET_LAYOUT = {
+    "A": (["Subdomain", "IP", "TTL"], [40, 20, 8]),
+    "AAAA": (["Subdomain", "IP", "TTL"], [40, 40, 8]),
+    "CNAME": (["Subdomain", "Chain #", "Target", "TTL"], [40, 8, 40, 8]),
+    "MX": (["Subdomain", "Priority", "Mail Server", "TTL"], [40, 10, 40, 8]),
+    "TXT": (["Subdomain", "TXT Value", "TTL"], [40, 60, 8]),
+    "NS": (["Subdomain", "Name Server", "TTL"], [40, 40, 8]),
+    "PTR": (["Subdomain", "PTR", "TTL"], [40, 40, 8]),
+    "SOA": (["Subdomain", "SOA", "TTL"], [40, 80, 8]),
+    "SRV": (["Subdomain", "SRV", "TTL"], [40, 40, 8]),
+    "CAA": (["Subdomain", "CAA", "TTL"], [40, 40, 8]),
+}
 
-def run_dns_resolution_and_export(merged_file: Path, result_dir: Path, input_identifier: str, dns_config: dict):
-    command_template = dns_config.get("command", "").strip()
-    if not command_template:
+
+def build_dns_command(dns_config: dict) -> str:
+    """读取 dns_resolution.command（替换 {resolvers}），确保 dnsx 以 JSON 行输出"""
+    command = dns_config.get("command", "").strip()
+    if not command:
         raise ValueError("dns_resolution.command 不能为空")
+    command = expand_resolvers(command)
+    if not _JSON_FLAG_RE.search(command):
+        command += " -json"
+    return command
+
+
+def resolve_names(names: list, dns_config: dict, command: str = None, track_progress: bool = True) -> RecordStore:
+    """
+    通过 stdin 把名字交给 dnsx，逐行解析其 JSON 输出到 RecordStore。
+    command 为 None 时使用 dns_resolution.command；track_progress=False 时由调用方管理进度条的起止。
+    """
+    command = command or build_dns_command(dns_config)
+    timeout = dns_config.get("timeout", 300)
+    store = RecordStore()
 
-    full_cmd = f"{command_template} -l {merged_file.absolute()}"
-    logger.info(f"🚀 正在运行 DNS 解析: {full_cmd}")
+    proc = subprocess.Popen(
+        command,
+        shell=True,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
 
+    def feed():
+        try:
+            for name in names:
+                proc.stdin.write(name + '\n')
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                proc.stdin.close()
+            except OSError:
+                pass
+
+    stderr_chunks = []
+    feeder = threading.Thread(target=feed, daemon=True)
+    drainer = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    watchdog = threading.Timer(timeout, kill)
+    feeder.start()
+    drainer.start()
+    watchdog.start()
+
+    # 进度按 dnsx 输出的结果行计（写入 stdin 的名字会被 dnsx 一次读完，不代表已解析）；
+    # 命中只计有 A/AAAA 的主机。track_progress=False 时由调用方按批次计数
+    unparsed = 0
+    addresses = store.columns["A"].host_ids, store.columns["AAAA"].host_ids
+    if track_progress:
+        progress.dns_started(len(names))
     try:
-        result = subprocess.run(
-            full_cmd,
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("dnsx 执行超时（5分钟）")
-
-    if result.returncode != 0:
-        logger.error(f"dnsx stderr: {result.stderr}")
-        raise RuntimeError(f"dnsx 退出码 {result.returncode}")
-
-    # === 初始化记录存储 ===
-    records = {"A": [], "AAAA": [], "CNAME": [], "MX": [], "TXT": []}
-    a_domains = set()
-
-    # 编译 ANSI 清理正则（可复用）
-    ansi_escape = re.compile(r'\x1B[@-_][0-?]*[ -/]*[@-~]')
-
-    # === 逐行解析 dnsx 输出 ===
-    for line in result.stdout.splitlines():
-        line = line.strip()
-        if not line:
-            continue
+        for line in proc.stdout:
+            if not line.strip():
+                continue
+            before = len(addresses[0]) + len(addresses[1])
+            if store.ingest_json_line(line):
+                if track_progress:
+                    progress.dns_advance(done=1, hits=int(len(addresses[0]) + len(addresses[1]) > before))
+            else:
+                unparsed += 1
+        proc.wait()
+    finally:
+        if track_progress:
+            progress.dns_finished()
+        watchdog.cancel()
+        feeder.join()
+        drainer.join()
 
-        # 清理 ANSI 颜色码
-        clean_line = ansi_escape.sub('', line)
+    if timed_out.is_set():
+        raise RuntimeError(f"dnsx 执行超时（{timeout} 秒）")
+    if proc.returncode != 0:
+        logger.error(f"dnsx stderr: {''.join(stderr_chunks)}")
+        raise RuntimeError(f"dnsx 退出码 {proc.returncode}")
+    if unparsed:
+        logger.warning(f"⚠️  dnsx 有 {unparsed} 行非 JSON 输出被忽略")
+    return store
 
-        # 精准匹配: domain [TYPE] [value]
-        match = re.match(r'^([^\s]+)\s+\[([A-Z]+)\]\s+\[(.*)\]$', clean_line)
-        if not match:
-            continue
 
-        domain, rtype, value = match.groups()
-        domain = domain.lower().rstrip('.')
-
-        if rtype == "A":
-            records["A"].append((domain, value))
-            a_domains.add(domain)
-        elif rtype == "AAAA":
-            records["AAAA"].append((domain, value))
-            a_domains.add(domain)
-        elif rtype == "CNAME":
-            records["CNAME"].append((domain, value))
-        elif rtype == "MX":
-            parts = value.split(maxsplit=1)
-            priority = parts[0] if len(parts) > 0 else ""
-            mail_server = parts[1] if len(parts) > 1 else value
-            records["MX"].append((domain, priority, mail_server))
-        elif rtype == "TXT":
-            records["TXT"].append((domain, value))
-
-    # === 写入 Excel ===
-    timestamp = merged_file.stem.split('_')[-2:]
-    timestamp_str = '_'.join(timestamp)
+class BatchJournal:
+    """
+    DNS 批次检查点：每批解析完成后追加一行 JSON（该批已得出结论的名字、记录与应答状态），
+    续跑时重放已完成的批次，只解析剩余的名字。进程被杀时写了一半的末行解析失败，按未完成处理并截掉。
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> tuple:
+        """返回 (重放得到的 RecordStore, 已完成的名字集合)"""
+        store, done = RecordStore(), set()
+        if not self.path.is_file():
+            return store, done
+        good_end = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    break
+                for host, rtype, value, ttl, pos in entry.get("records", []):
+                    store.add(host, rtype, value, ttl, pos)
+                for host, code in entry.get("status", {}).items():
+                    store.status[store.host_id(host)] = code
+                store.given_up.update(entry.get("given_up", []))
+                done.update(entry.get("done", []))
+                good_end += len(raw)
+        if good_end < self.path.stat().st_size:
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+        return store, done
+
+    def append(self, batch_store: RecordStore, done: list, given_up: list):
+        hosts = batch_store.hosts
+        entry = {
+            "done": done,
+            "given_up": given_up,
+            "records": [[host, rtype, value, ttl, pos]
+                        for rtype in RECORD_TYPES for host, value, ttl, pos in batch_store.rows(rtype)],
+            "status": {hosts[hid]: code for hid, code in batch_store.status.items()},
+        }
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class AdaptiveResolver:
+    """
+    分批调用 dnsx，并按每批的失败率（无任何输出视为超时，SERVFAIL / REFUSED 视为错误）以 AIMD 方式调整 -t：
+    失败率不超过阈值且吞吐未下降时并发加法递增，超过阈值时乘法递减；失败的名字重新排队，最多尝试 max_attempts 次。
+    同一实例在多次 resolve 之间保留并发状态（合并结果之后的排列组合批次沿用已收敛的并发）。
+    """
+
+    def __init__(self, dns_config: dict):
+        cfg = dns_config.get("adaptive") or {}
+        command = build_dns_command(dns_config)
+        if not _RCODE_FLAG_RE.search(command):
+            command += f" -rcode {ADAPTIVE_RCODES}"
+        self.dns_config = dns_config
+        self.base_command = command
+        self.min_concurrency = max(1, int(cfg.get("min_concurrency", 10)))
+        self.max_concurrency = max(self.min_concurrency, int(cfg.get("max_concurrency", 500)))
+        match = _THREADS_RE.search(command)
+        initial = int(cfg.get("initial_concurrency") or (match.group(2) if match else 50))
+        self.concurrency = min(self.max_concurrency, max(self.min_concurrency, initial))
+        self.batch_size = max(1, int(cfg.get("batch_size", 20000)))
+        self.increase = max(1, int(cfg.get("increase", 20)))
+        self.decrease = min(0.95, max(0.1, float(cfg.get("decrease", 0.5))))
+        self.error_threshold = float(cfg.get("error_threshold", 0.05))
+        self.max_attempts = max(1, int(cfg.get("max_attempts", 3)))
+        self._last_rate = None  # 上一个满批次的吞吐（名字/秒）
+
+    def _command(self) -> str:
+        if _THREADS_RE.search(self.base_command):
+            return _THREADS_RE.sub(lambda m: f"{m.group(1)}-t {self.concurrency}", self.base_command, count=1)
+        return f"{self.base_command} -t {self.concurrency}"
+
+    def _adjust(self, failure_rate: float, rate: float, full_batch: bool):
+        if failure_rate > self.error_threshold:
+            self.concurrency = max(self.min_concurrency, int(self.concurrency * self.decrease))
+        elif full_batch and self._last_rate is not None and rate < self._last_rate * 0.8:
+            pass  # 加并发反而变慢：已到解析器 / 网络的饱和点，保持不变
+        else:
+            self.concurrency = min(self.max_concurrency, self.concurrency + self.increase)
+        if full_batch:
+            self._last_rate = rate
+
+    def resolve(self, names: list, journal: BatchJournal = None) -> RecordStore:
+        """journal 不为 None 时每批完成后写检查点，并跳过检查点中已完成的名字"""
+        store = RecordStore()
+        if journal is not None:
+            replayed, done = journal.load()
+            if done:
+                store.extend(replayed)
+                store.given_up.update(replayed.given_up)
+                names = [name for name in names if name not in done]
+                logger.info(f"♻️  DNS 检查点: {len(done)} 个名字已在之前的批次完成，剩余 {len(names)} 个")
+        fresh = deque(names)
+        retry = deque()
+        attempts = {}  # 只记录失败过的名字: 已尝试次数
+        given_up = []
+        broken_batches = 0
+        batch_no = 0
+        progress.dns_started(len(names))
+        try:
+            while fresh or retry:
+                batch = []
+                while retry and len(batch) < self.batch_size:
+                    batch.append(retry.popleft())
+                while fresh and len(batch) < self.batch_size:
+                    batch.append(fresh.popleft())
+                batch_no += 1
+                concurrency = self.concurrency
+                started = time.monotonic()
+                try:
+                    batch_store = resolve_names(batch, self.dns_config, command=self._command(), track_progress=False)
+                    broken_batches = 0
+                except RuntimeError as e:
+                    # 超时被杀或异常退出：整批按失败处理，降并发后重试；连续多批如此说明不是负载问题
+                    broken_batches += 1
+                    if broken_batches >= 3:
+                        raise
+                    logger.warning(f"⚠️  DNS 批次 {batch_no} 失败（t={concurrency}）: {e}")
+                    batch_store = RecordStore()
+                elapsed = max(time.monotonic() - started, 1e-6)
+                store.extend(batch_store)
+
+                answered = set(batch_store.hosts)
+                errored = batch_store.hosts_with_status(*ERROR_RCODES)
+                timeouts = 0
+                requeued = 0
+                settled, batch_given_up = [], []
+                for name in batch:
+                    if name in answered and name not in errored:
+                        settled.append(name)
+                        continue
+                    timeouts += name not in answered
+                    tried = attempts.get(name, 0) + 1
+                    if tried >= self.max_attempts:
+                        settled.append(name)
+                        batch_given_up.append(name)
+                    else:
+                        attempts[name] = tried
+                        retry.append(name)
+                        requeued += 1
+                given_up.extend(batch_given_up)
+                # 进度按已得出结论的名字计（重新排队的名字留到之后的批次），总量不变
+                resolved = batch_store.resolved_hosts()
+                progress.dns_advance(done=len(settled), hits=sum(1 for name in settled if name in resolved))
+                if journal is not None:
+                    journal.append(batch_store, settled, batch_given_up)
+
+                errors = len(errored)
+                failure_rate = (timeouts + errors) / len(batch)
+                rate = len(batch) / elapsed
+                if len(batch) >= min(self.batch_size, 100):  # 零星重试的小批次样本太少，不据此调整
+                    self._adjust(failure_rate, rate, len(batch) == self.batch_size)
+                logger.info(f"🧭 DNS 批次 {batch_no}: {len(batch)} 个名字，t={concurrency}，{elapsed:.1f}s（{rate:.0f}/s），"
+                            f"超时 {timeouts / len(batch):.1%}，错误 {errors / len(batch):.1%}，"
+                            f"重新排队 {requeued} → 下一批 t={self.concurrency}")
+        finally:
+            progress.dns_finished()
+
+        if given_up:
+            logger.warning(f"⚠️  {len(given_up)} 个名字 {self.max_attempts} 次尝试均超时或出错，已放弃")
+        store.given_up.update(given_up)
+        return store
+
+
+def make_resolver(dns_config: dict):
+    """
+    返回 (names, journal=None) -> RecordStore 的解析函数：dns_resolution.adaptive.enabled 时使用自适应并发。
+    单次调用 dnsx 的模式只有一个批次，不写检查点。
+    """
+    if (dns_config.get("adaptive") or {}).get("enabled", False):
+        return AdaptiveResolver(dns_config).resolve
+    return lambda names, journal=None: resolve_names(names, dns_config)
+
+
+def _sheet_row(rtype: str, host: str, value: str, ttl: int, pos: int) -> list:
+    if rtype == "CNAME":
+        return [host, pos + 1, value, ttl]
+    if rtype == "MX":
+        parts = value.split(maxsplit=1)
+        if len(parts) == 2 and parts[0].isdigit():
+            return [host, parts[0], parts[1], ttl]
+        return [host, "", value, ttl]
+    return [host, value, ttl]
+
+
+def _sheet_rows(store: RecordStore, rtype: str):
+    for host, value, ttl, pos in store.rows(rtype):
+        yield _sheet_row(rtype, host, value, ttl, pos)
+
+
+def export_reports(store: RecordStore, names: list, result_dir: Path, input_identifier: str,
+                   timestamp_str: str, extra_sheets=None):
+    """
+    由 RecordStore 生成 Excel 报告与 reachable 清单。
+    extra_sheets: 可选的附加 sheet 列表 [(标题, 表头, 列宽, 行迭代器), ...]
+    """
     excel_filename = f"{input_identifier}_dns_{timestamp_str}.xlsx"
     excel_path = result_dir / excel_filename
 
-    wb = Workbook()
-    ws_raw = wb.active
-    ws_raw.title = "Raw Merged"
-    ws_raw.append(["Subdomain"])
+    # write_only 模式逐行落盘，大结果集不会在内存里堆满单元格对象
+    wb = Workbook(write_only=True)
+    ws_raw = wb.create_sheet(title="Raw Merged")
     ws_raw.column_dimensions['A'].width = 40
-    with open(merged_file, 'r', encoding='utf-8', errors='ignore') as f:
-        for line in f:
-            domain = line.strip().lower().rstrip('.')
-            if domain:
-                ws_raw.append([domain])
-
-    for rtype in ["A", "AAAA", "CNAME", "MX", "TXT"]:
-        if not records[rtype]:
+    ws_raw.append(["Subdomain"])
+    for domain in names:
+        ws_raw.append([domain])
+
+    sheets = []
+    for rtype in RECORD_TYPES:
+        if not store.count(rtype):
             continue
-        ws = wb.create_sheet(title=rtype)
-        if rtype in ("A", "AAAA"):
-            ws.append(["Subdomain", "IP"])
-            ws.column_dimensions['A'].width = 40
-            ws.column_dimensions['B'].width = 20
-            for domain, ip in records[rtype]:
-                ws.append([domain, ip])
-        elif rtype == "CNAME":
-            ws.append(["Subdomain", "Target"])
-            ws.column_dimensions['A'].width = 40
-            ws.column_dimensions['B'].width = 40
-            for domain, target in records[rtype]:
-                ws.append([domain, target])
-        elif rtype == "MX":
-            ws.append(["Subdomain", "Priority", "Mail Server"])
-            ws.column_dimensions['A'].width = 40
-            ws.column_dimensions['B'].width = 10
-            ws.column_dimensions['C'].width = 40
-            for domain, priority, server in records[rtype]:
-                ws.append([domain, priority, server])
-        elif rtype == "TXT":
-            ws.append(["Subdomain", "TXT Value"])
-            ws.column_dimensions['A'].width = 40
-            ws.column_dimensions['B'].width = 60
-            for domain, txt in records[rtype]:
-                ws.append([domain, txt])
-
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-            cell.fill = PatternFill(start_color="D9EAD3", end_color="D9EAD3", fill_type="solid")
+        headers, widths = SHEET_LAYOUT[rtype]
+        sheets.append((rtype, headers, widths, _sheet_rows(store, rtype)))
+    sheets.extend(extra_sheets or [])
+
+    for title, headers, widths, rows in sheets:
+        ws = wb.create_sheet(title=title)
+        for i, width in enumerate(widths):
+            ws.column_dimensions[chr(ord('A') + i)].width = width
+        ws.append(_header_cells(ws, headers))
+        for row in rows:
+            ws.append(row)
 
     wb.save(excel_path)
     logger.debug(f"✅ Excel 报告已保存: {excel_path}")
@@ -128,8 +373,98 @@ def run_dns_resolution_and_export(merged_file: Path, result_dir: Path, input_ide
     reachable_filename = f"{input_identifier}_reachable.txt"
     reachable_path = result_dir / reachable_filename
     with open(reachable_path, 'w', encoding='utf-8') as f:
-        for domain in sorted(a_domains):
+        for domain in sorted(store.resolved_hosts()):
             f.write(domain + '\n')
     logger.debug(f"✅ 可探测目标清单已保存: {reachable_path}")
 
-    return excel_path, reachable_path
\ No newline at end of file
+    return excel_path, reachable_path
+
+
+def _header_cells(ws, headers: list) -> list:
+    """write_only 模式下表头需以带样式的 WriteOnlyCell 写入"""
+    cells = []
+    for title in headers:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="D9EAD3", end_color="D9EAD3", fill_type="solid")
+        cells.append(cell)
+    return cells
+
+
+def read_merged_names(merged_file: Path) -> list:
+    with open_text(merged_file) as f:
+        return [d for d in (line.strip().lower().rstrip('.') for line in f) if d]
+
+
+def resolve_permutations(permuter, names: list, resolve) -> RecordStore:
+    """
+    排列组合候选按批交给 dnsx（候选流式生成，任何时刻只持有一批），
+    只保留有 A/AAAA 的命中，最后做泛解析过滤。
+    候选过滤器此处只在内存中更新，由调用方在命中写入结果之后保存（permuter.save_state）。
+    """
+    found = RecordStore()
+    tried = 0
+    for i, batch in enumerate(permuter.batches(names), 1):
+        tried += len(batch)
+        batch_store = resolve(batch)
+        hits = batch_store.resolved_hosts()
+        found.extend(batch_store, hosts=hits)
+        permuter.settle(batch, batch_store.given_up)
+        logger.info(f"🧬 排列组合第 {i} 批: {len(batch)} 个候选，命中 {len(hits)}（累计尝试 {tried}）")
+
+    kept = permuter.drop_wildcards(found)
+    result = RecordStore()
+    result.extend(found, hosts=kept)
+    logger.info(f"✅ 排列组合完成: 尝试 {tried} 个候选，新发现 {len(kept)} 个可达主机"
+                f"（过滤器误判率约 {permuter.bloom.false_positive_rate():.2%}）")
+    return result
+
+
+def run_dns_resolution_and_export(merged_file: Path, result_dir: Path, input_identifier: str, dns_config: dict,
+                                  record_sink=None, permuter=None, prober=None, aggregator=None):
+    """
+    dnsx 解析合并结果并导出 Excel / reachable 清单。
+    record_sink 为可选回调，接收 (domain, rtype, value) 迭代器（如资产库批量写入）。
+    permuter 不为 None 时，在合并结果之后继续解析排列组合候选，命中并入报告，
+    新发现的名字写入 permuter.discovered 与结果目录的 *_permuted.txt。
+    aggregator 不为 None 时按 IP / 网段聚合并标记 CDN 主机（By IP / By Network / By Host sheet）。
+    prober 不为 None 时对可达主机做 HTTP 探测，结果作为附加 sheet 写入报告。
+    """
+    names = read_merged_names(merged_file)
+    logger.info(f"🚀 正在运行 DNS 解析: {build_dns_command(dns_config)} < {merged_file.name}（{len(names)} 个）")
+
+    # 检查点与合并结果同名：工具重跑生成新的合并文件时，旧检查点自然不再匹配
+    journal = BatchJournal(merged_file.with_name(merged_file.name + ".dns.jsonl"))
+    resolve = make_resolver(dns_config)
+    store = resolve(names, journal=journal)
+    counts = ", ".join(f"{rtype} {store.count(rtype)}" for rtype in RECORD_TYPES if store.count(rtype))
+    logger.info(f"✅ DNS 解析完成: {len(store.resolved_hosts())} 个可达主机（{counts or '无记录'}）")
+
+    extra_sheets = []
+    if permuter is not None:
+        found = resolve_permutations(permuter, names, resolve)
+        permuter.discovered = sorted(found.resolved_hosts())
+        store.extend(found)
+        if permuter.discovered:
+            permuted_path = result_dir / f"{input_identifier}_permuted.txt"
+            with open(permuted_path, 'w', encoding='utf-8') as f:
+                for name in permuter.discovered:
+                    f.write(name + '\n')
+            logger.info(f"🧬 排列组合新发现: {permuted_path.name}")
+            extra_sheets.append(("Permutations", ["Subdomain"], [40], ([name] for name in permuter.discovered)))
+        # 命中已落盘，才把本次尝试过的候选并入历史过滤器
+        permuter.save_state()
+
+    if aggregator is not None:
+        extra_sheets.extend(aggregator.run(store, result_dir, input_identifier))
+    if prober is not None:
+        extra_sheets.append(prober.run(store, result_dir, input_identifier))
+
+    if record_sink is not None:
+        record_sink(store.iter_records())
+
+    timestamp = merged_file.stem.split('_')[-2:]
+    timestamp_str = '_'.join(timestamp)
+    paths = export_reports(store, names, result_dir, input_identifier, timestamp_str, extra_sheets=extra_sheets)
+    journal.remove()
+    return paths
@@ -0,0 +1,251 @@
+# core/http_client.py
+import asyncio
+import json
+import ssl
+import zlib
+from urllib.parse import urlsplit, urlencode, urljoin
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; s1hua)"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+
+class HTTPError(Exception):
+    """连接失败、超时或响应格式错误"""
+
+
+# 调用方统一捕获的网络 / 协议异常
+TRANSPORT_ERRORS = (HTTPError, OSError, ssl.SSLError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError)
+
+
+class Response:
+    __slots__ = ("url", "status", "reason", "headers", "body", "truncated")
+
+    def __init__(self, url, status, reason, headers, body, truncated=False):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.truncated = truncated
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+def _decode_body(body: bytes, encoding: str, partial: bool = False) -> bytes:
+    """解压响应体；partial=True 时容忍被截断的压缩流，尽量解出前半部分"""
+    if encoding == "gzip":
+        wbits_options = (16 + zlib.MAX_WBITS,)
+    else:
+        wbits_options = (zlib.MAX_WBITS, -zlib.MAX_WBITS)
+    for wbits in wbits_options:
+        try:
+            if partial:
+                return zlib.decompressobj(wbits).decompress(body)
+            return zlib.decompress(body, wbits)
+        except zlib.error as e:
+            error = e
+    raise error
+
+
+class AsyncHTTPClient:
+    """
+    基于 asyncio 流的精简 HTTP/1.1 客户端：按 (scheme, host, port) 复用 keep-alive 连接，
+    供插件枚举器与 HTTP 存活探测共用，不引入第三方依赖。
+    """
+
+    def __init__(self, timeout: float = 15.0, verify_ssl: bool = True, max_body: int = 64 * 1024 * 1024,
+                 max_idle_per_host: int = 4, user_agent: str = DEFAULT_USER_AGENT):
+        self.timeout = timeout
+        self.max_body = max_body
+        self.max_idle_per_host = max_idle_per_host
+        self.user_agent = user_agent
+        self._idle = {}
+        if verify_ssl:
+            self._ssl = ssl.create_default_context()
+        else:
+            self._ssl = ssl.create_default_context()
+            self._ssl.check_hostname = False
+            self._ssl.verify_mode = ssl.CERT_NONE
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        for conns in self._idle.values():
+            for _, writer in conns:
+                writer.close()
+        self._idle.clear()
+
+    def close_idle(self, scheme: str, host: str, port: int):
+        """关闭某个源的空闲连接（逐主机探测时用完即还，避免空闲连接随主机数累积）"""
+        for _, writer in self._idle.pop((scheme, host, port), ()):
+            writer.close()
+
+    # ---------- 连接池 ----------
+    async def _connect(self, key, address=None):
+        scheme, host, port = key
+        reader, writer = await asyncio.open_connection(
+            address or host, port,
+            ssl=self._ssl if scheme == "https" else None,
+            server_hostname=host if scheme == "https" else None
+        )
+        return reader, writer
+
+    def _take_idle(self, key):
+        conns = self._idle.get(key)
+        while conns:
+            reader, writer = conns.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def _release(self, key, conn):
+        conns = self._idle.setdefault(key, [])
+        if len(conns) < self.max_idle_per_host:
+            conns.append(conn)
+        else:
+            conn[1].close()
+
+    # ---------- 请求 ----------
+    async def get(self, url: str, **kwargs) -> Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def request(self, method: str, url: str, params: dict = None, headers: dict = None,
+                      timeout: float = None, follow_redirects: bool = False, max_body: int = None,
+                      address: str = None) -> Response:
+        """address: 直接连接的 IP（已由 DNS 阶段解析时可跳过系统解析，Host / SNI 仍用 URL 中的主机名）"""
+        if params:
+            url += ("&" if "?" in url else "?") + urlencode(params)
+        for _ in range(6):
+            resp = await asyncio.wait_for(
+                self._request_once(method, url, headers or {}, max_body or self.max_body, address),
+                timeout or self.timeout
+            )
+            location = resp.headers.get("location")
+            if not (follow_redirects and resp.status in REDIRECT_STATUSES and location):
+                return resp
+            next_url = urljoin(url, location)
+            if urlsplit(next_url).hostname != urlsplit(url).hostname:
+                address = None
+            url = next_url
+        raise HTTPError(f"重定向次数过多: {url}")
+
+    async def _request_once(self, method, url, headers, max_body, address=None):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise HTTPError(f"不支持的 URL: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        key = (scheme, parts.hostname, port)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        host_header = parts.hostname if parts.port is None else f"{parts.hostname}:{parts.port}"
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host_header}",
+                 f"User-Agent: {self.user_agent}", "Accept: */*",
+                 "Accept-Encoding: gzip, deflate", "Connection: keep-alive"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        raw_request = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+        conn = self._take_idle(key)
+        if conn is not None:
+            try:
+                return await self._exchange(key, conn, url, method, raw_request, max_body)
+            except (ConnectionError, asyncio.IncompleteReadError, HTTPError):
+                conn[1].close()  # 服务器已关闭空闲连接：换新连接重试一次
+            except BaseException:
+                conn[1].close()
+                raise
+        try:
+            conn = await self._connect(key, address)
+        except (OSError, ssl.SSLError) as e:
+            raise HTTPError(f"连接失败 {parts.hostname}:{port}: {e}") from e
+        try:
+            return await self._exchange(key, conn, url, method, raw_request, max_body)
+        except BaseException:
+            conn[1].close()
+            raise
+
+    async def _exchange(self, key, conn, url, method, raw_request, max_body):
+        reader, writer = conn
+        writer.write(raw_request)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise HTTPError("连接被关闭")
+        try:
+            version, status, *reason = status_line.decode("latin-1").split(" ", 2)
+            status = int(status)
+        except ValueError:
+            raise HTTPError(f"无效的状态行: {status_line[:80]!r}")
+        reason = reason[0].strip() if reason else ""
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        reusable = headers.get("connection", "").lower() != "close" and version.upper() == "HTTP/1.1"
+        truncated = False
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks, size_total = [], 0
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b";", 1)[0].strip() or b"0", 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                if size_total + size > max_body:
+                    truncated, reusable = True, False
+                    chunks.append(await reader.readexactly(max(0, max_body - size_total)))
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+                size_total += size
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            length = int(headers["content-length"])
+            if length > max_body:
+                truncated, reusable = True, False
+            body = await reader.readexactly(min(length, max_body))
+        else:
+            # 无长度、非分块：响应体以关闭连接结束。read(n) 只返回已缓冲的部分，需循环读到 EOF 或上限
+            chunks, size_total = [], 0
+            while size_total < max_body:
+                chunk = await reader.read(max_body - size_total)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                size_total += len(chunk)
+            body = b"".join(chunks)
+            reusable = False
+            truncated = size_total >= max_body and bool(await reader.read(1))
+
+        if reusable:
+            self._release(key, conn)
+        else:
+            writer.close()
+
+        encoding = headers.get("content-encoding", "").lower()
+        if body and encoding in ("gzip", "deflate"):
+            try:
+                body = _decode_body(body, encoding, partial=truncated)
+            except zlib.error as e:
+                raise HTTPError(f"响应解压失败: {e}")
+        return Response(url, status, reason, headers, body, truncated)
@@ -0,0 +1,192 @@
+# core/http_probe.py
+import asyncio
+import html
+import re
+import time
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from .utils import logger
+from .dns_records import RecordStore, ADDRESS_TYPES
+from .http_client import AsyncHTTPClient, TRANSPORT_ERRORS
+from .progress import progress
+
+DEFAULT_PORTS = (80, 443, 8080, 8443)
+# 未写明协议的端口中默认走 HTTPS 的
+HTTPS_PORTS = {443, 8443, 9443}
+
+_TITLE_RE = re.compile(rb'<title[^>]*>(.*?)</title>', re.I | re.S)
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.-]+)', re.I)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w.-]+)', re.I)
+_SPACE_RE = re.compile(r'\s+')
+
+# 报告中的列（Excel sheet 与文本输出共用）
+HEADERS = ["URL", "Status", "Title", "Server", "Redirect", "Length", "IP"]
+WIDTHS = [45, 8, 40, 20, 45, 10, 16]
+
+
+class ProbeResult:
+    __slots__ = ("url", "host", "ip", "status", "title", "server", "redirect", "length")
+
+    def __init__(self, url, host, ip, status, title, server, redirect, length):
+        self.url = url
+        self.host = host
+        self.ip = ip
+        self.status = status
+        self.title = title
+        self.server = server
+        self.redirect = redirect
+        self.length = length
+
+    def row(self) -> list:
+        return [self.url, self.status, self.title, self.server, self.redirect, self.length, self.ip]
+
+
+def parse_ports(ports) -> list:
+    """端口配置：80 / 8443 / "https:8000" / "http:8443"，返回 [(scheme, port), ...]"""
+    result = []
+    for item in ports or DEFAULT_PORTS:
+        text = str(item).strip().lower()
+        scheme, _, port = text.rpartition(':')
+        port = int(port)
+        if not scheme:
+            scheme = "https" if port in HTTPS_PORTS else "http"
+        if scheme not in ("http", "https") or not 0 < port < 65536:
+            raise ValueError(f"无效的探测端口: {item}")
+        if (scheme, port) not in result:
+            result.append((scheme, port))
+    return result
+
+
+def extract_title(body: bytes, content_type: str = "") -> str:
+    match = _TITLE_RE.search(body)
+    if not match:
+        return ""
+    charset = _CHARSET_RE.search(content_type or "")
+    charset = charset.group(1) if charset else None
+    if charset is None:
+        meta = _META_CHARSET_RE.search(body)
+        charset = meta.group(1).decode('ascii', 'ignore') if meta else "utf-8"
+    try:
+        title = match.group(1).decode(charset, errors='replace')
+    except LookupError:
+        title = match.group(1).decode('utf-8', errors='replace')
+    return _SPACE_RE.sub(' ', html.unescape(title)).strip()[:200]
+
+
+def host_addresses(store: RecordStore) -> dict:
+    """主机 -> 用于直连的一个地址（优先 IPv4），探测时无需再走系统 DNS"""
+    addresses = {}
+    for rtype in ADDRESS_TYPES:
+        for host, value, _, _ in store.rows(rtype):
+            addresses.setdefault(host, value)
+    return addresses
+
+
+def _origin(url: str) -> tuple:
+    parts = urlsplit(url)
+    return parts.scheme, parts.hostname, parts.port
+
+
+async def _probe_one(client: AsyncHTTPClient, host: str, ip: str, scheme: str, port: int, max_redirects: int):
+    default_port = 443 if scheme == "https" else 80
+    url = f"{scheme}://{host}/" if port == default_port else f"{scheme}://{host}:{port}/"
+    address = ip if ':' not in ip else None  # IPv6 直连需额外处理，交给系统解析
+    try:
+        resp = await client.get(url, address=address)
+        redirect = ""
+        if 300 <= resp.status < 400 and resp.headers.get("location"):
+            redirect = urljoin(url, resp.headers["location"])
+            # 同源跳转（/ -> /login 等）沿用连接池里的同一条连接取最终页面标题
+            final, hops = resp, 0
+            try:
+                while (hops < max_redirects and 300 <= final.status < 400 and final.headers.get("location")):
+                    next_url = urljoin(final.url, final.headers["location"])
+                    if _origin(next_url) != _origin(url):
+                        break
+                    final = await client.get(next_url, address=address)
+                    hops += 1
+                page = final
+            except TRANSPORT_ERRORS:
+                page = None  # 主机已经应答，跳转后的页面取不到只是没有标题
+        else:
+            page = resp
+        title = extract_title(page.body, page.headers.get("content-type", "")) if page is not None else ""
+        try:
+            length = int(resp.headers.get("content-length", len(resp.body)))
+        except ValueError:
+            length = len(resp.body)
+        return ProbeResult(url, host, ip, resp.status, title, resp.headers.get("server", ""), redirect, length)
+    except TRANSPORT_ERRORS:
+        return None
+    finally:
+        client.close_idle(scheme, host, port)
+
+
+async def _probe_all(jobs, total: int, cfg: dict) -> list:
+    results = []
+    concurrency = max(1, int(cfg.get("concurrency", 200)))
+    max_redirects = int(cfg.get("max_redirects", 2))
+    client = AsyncHTTPClient(
+        timeout=float(cfg.get("timeout", 5)),
+        verify_ssl=False,
+        max_body=int(cfg.get("max_body", 64 * 1024)),
+        max_idle_per_host=1,
+    )
+    async with client:
+        async def worker():
+            # 所有 worker 共享同一个任务迭代器：并发上限即 worker 数，任务不会一次性展开成协程
+            for host, ip, scheme, port in jobs:
+                result = await _probe_one(client, host, ip, scheme, port, max_redirects)
+                progress.dns_advance(done=1, hits=int(result is not None))
+                if result is not None:
+                    results.append(result)
+
+        progress.dns_started(total, label="HTTP")
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, max(1, total)))))
+        finally:
+            progress.dns_finished()
+    return results
+
+
+def probe_hosts(addresses: dict, cfg: dict) -> list:
+    """
+    并发探测 {主机: IP} 在配置端口上的 HTTP(S) 服务，返回 ProbeResult 列表（按 URL 排序）。
+    直连 DNS 阶段解析出的 IP，Host 头与 SNI 使用主机名。
+    """
+    ports = parse_ports(cfg.get("ports"))
+    total = len(addresses) * len(ports)
+    if not total:
+        return []
+    # 端口在外层：同一主机的多个端口不会挤在一起并发
+    jobs = ((host, ip, scheme, port) for scheme, port in ports for host, ip in addresses.items())
+    started = time.monotonic()
+    results = asyncio.run(_probe_all(jobs, total, cfg))
+    elapsed = time.monotonic() - started
+    logger.info(f"✅ HTTP 探测完成: {total} 个目标中 {len(results)} 个有响应（{elapsed:.1f}s，{total / max(elapsed, 1e-6):.0f}/s）")
+    results.sort(key=lambda r: r.url)
+    return results
+
+
+class HttpProber:
+    """DNS 阶段之后的 HTTP 存活探测：结果写入 Excel 附加 sheet、*_http.txt，并保存在 results 供资产库登记"""
+
+    def __init__(self, cfg: dict):
+        self.cfg = cfg
+        self.results = []
+        parse_ports(cfg.get("ports"))  # 配置错误尽早暴露
+
+    def run(self, store: RecordStore, result_dir: Path, input_identifier: str):
+        addresses = host_addresses(store)
+        logger.info(f"🌐 正在探测 HTTP 服务: {len(addresses)} 个主机 × {len(parse_ports(self.cfg.get('ports')))} 个端口")
+        self.results = probe_hosts(addresses, self.cfg)
+
+        output_path = result_dir / f"{input_identifier}_http.txt"
+        with open(output_path, 'w', encoding='utf-8') as f:
+            for r in self.results:
+                line = f"{r.url} [{r.status}] [{r.title}] [{r.server}]"
+                if r.redirect:
+                    line += f" -> {r.redirect}"
+                f.write(line + '\n')
+        logger.info(f"🌐 HTTP 服务清单: {output_path.name}")
+        return ("HTTP", HEADERS, WIDTHS, (r.row() for r in self.results))
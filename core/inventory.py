@@ -0,0 +1,258 @@
+# core/inventory.py
+import re
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from .utils import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    identifier  TEXT NOT NULL,
+    started     TEXT NOT NULL,
+    log_dir     TEXT,
+    result_dir  TEXT
+);
+CREATE TABLE IF NOT EXISTS subdomains (
+    name        TEXT PRIMARY KEY,
+    apex        TEXT,
+    first_seen  TEXT NOT NULL,
+    last_seen   TEXT NOT NULL,
+    first_run   INTEGER,
+    last_run    INTEGER
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_subdomains_apex ON subdomains(apex, first_seen);
+CREATE INDEX IF NOT EXISTS idx_subdomains_first_seen ON subdomains(first_seen, apex);
+CREATE TABLE IF NOT EXISTS records (
+    name        TEXT NOT NULL,
+    rtype       TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    first_seen  TEXT NOT NULL,
+    last_seen   TEXT NOT NULL,
+    last_run    INTEGER,
+    PRIMARY KEY (name, rtype, value)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_records_value ON records(value, rtype);
+CREATE TABLE IF NOT EXISTS http (
+    url         TEXT PRIMARY KEY,
+    host        TEXT NOT NULL,
+    status      INTEGER,
+    title       TEXT,
+    server      TEXT,
+    redirect    TEXT,
+    first_seen  TEXT NOT NULL,
+    last_seen   TEXT NOT NULL,
+    last_run    INTEGER
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_http_host ON http(host);
+"""
+
+QUERY_KINDS = ("stats", "growth", "new", "apex", "ip", "name", "http")
+
+_BATCH = 50000
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _fallback_apex(name: str) -> str:
+    """无范围索引时的近似根域：取最后两级标签"""
+    return ".".join(name.rsplit(".", 2)[-2:])
+
+
+def parse_since(text: str) -> str:
+    """'7d' / '24h' / '30m' / '2025-01-31' → ISO 时间字符串"""
+    text = (text or "7d").strip().lower()
+    match = re.fullmatch(r'(\d+)\s*([dhm])', text)
+    if match:
+        n, unit = int(match.group(1)), match.group(2)
+        delta = {"d": timedelta(days=n), "h": timedelta(hours=n), "m": timedelta(minutes=n)}[unit]
+        return (datetime.now() - delta).isoformat(timespec="seconds")
+    try:
+        return datetime.fromisoformat(text).isoformat(timespec="seconds")
+    except ValueError:
+        raise ValueError(f"无法解析时间: {text}（示例: 7d / 24h / 2025-01-31）")
+
+
+def inventory_path(config: dict):
+    """启用资产库时返回数据库路径，否则返回 None"""
+    inv_cfg = config.get("inventory") or {}
+    if not inv_cfg.get("enabled", False):
+        return None
+    return Path(inv_cfg.get("path", "./inventory.db")).expanduser().resolve()
+
+
+class Inventory:
+    """跨任务的 SQLite 资产库：runs / subdomains / records，记录首次与最近出现时间"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 写入 ----------
+    def start_run(self, identifier: str, log_dir: Path, result_dir: Path) -> int:
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO runs(identifier, started, log_dir, result_dir) VALUES (?, ?, ?, ?)",
+                (identifier, _now(), str(log_dir), str(result_dir))
+            )
+        return cur.lastrowid
+
+    def _bulk(self, sql: str, rows):
+        count = 0
+        batch = []
+        with self.conn:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= _BATCH:
+                    self.conn.executemany(sql, batch)
+                    count += len(batch)
+                    batch.clear()
+            if batch:
+                self.conn.executemany(sql, batch)
+                count += len(batch)
+        return count
+
+    def add_subdomains(self, run_id: int, names, scope=None) -> int:
+        """批量登记子域名；scope 为 SuffixIndex 时用它确定所属根域"""
+        now = _now()
+
+        def rows():
+            for name in names:
+                apex = scope.match(name) if scope is not None else None
+                yield (name, apex or _fallback_apex(name), now, now, run_id, run_id)
+
+        return self._bulk(
+            "INSERT INTO subdomains(name, apex, first_seen, last_seen, first_run, last_run) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET last_seen = excluded.last_seen, last_run = excluded.last_run",
+            rows()
+        )
+
+    def add_records(self, run_id: int, records) -> int:
+        """批量登记 DNS 记录，records 为 (name, rtype, value) 迭代器"""
+        now = _now()
+        return self._bulk(
+            "INSERT INTO records(name, rtype, value, first_seen, last_seen, last_run) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name, rtype, value) DO UPDATE SET last_seen = excluded.last_seen, last_run = excluded.last_run",
+            ((name, rtype, value, now, now, run_id) for name, rtype, value in records)
+        )
+
+    def add_http(self, run_id: int, results) -> int:
+        """批量登记 HTTP 探测结果（ProbeResult 迭代器），状态 / 标题等取最近一次"""
+        now = _now()
+        return self._bulk(
+            "INSERT INTO http(url, host, status, title, server, redirect, first_seen, last_seen, last_run) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET status = excluded.status, title = excluded.title, "
+            "server = excluded.server, redirect = excluded.redirect, "
+            "last_seen = excluded.last_seen, last_run = excluded.last_run",
+            ((r.url, r.host, r.status, r.title, r.server, r.redirect, now, now, run_id) for r in results)
+        )
+
+    # ---------- 查询 ----------
+    def query(self, kind: str, arg: str = None, extra: str = None):
+        """返回 (表头, 行列表)"""
+        c = self.conn
+        if kind == "stats":
+            rows = [
+                ("runs", c.execute("SELECT COUNT(*) FROM runs").fetchone()[0]),
+                ("subdomains", c.execute("SELECT COUNT(*) FROM subdomains").fetchone()[0]),
+                ("apexes", c.execute("SELECT COUNT(DISTINCT apex) FROM subdomains").fetchone()[0]),
+                ("records", c.execute("SELECT COUNT(*) FROM records").fetchone()[0]),
+                ("http", c.execute("SELECT COUNT(*) FROM http").fetchone()[0]),
+            ]
+            return ("item", "count"), rows
+        if kind == "growth":
+            since = parse_since(arg)
+            rows = c.execute(
+                "SELECT apex, COUNT(*) FROM subdomains WHERE first_seen >= ? "
+                "GROUP BY apex ORDER BY COUNT(*) DESC, apex", (since,)
+            ).fetchall()
+            return ("apex", f"new_since_{since}"), rows
+        if kind == "new":
+            since = parse_since(arg)
+            if extra:
+                rows = c.execute(
+                    "SELECT name, apex, first_seen FROM subdomains WHERE apex = ? AND first_seen >= ? "
+                    "ORDER BY first_seen", (extra.lower(), since)
+                ).fetchall()
+            else:
+                rows = c.execute(
+                    "SELECT name, apex, first_seen FROM subdomains WHERE first_seen >= ? "
+                    "ORDER BY first_seen", (since,)
+                ).fetchall()
+            return ("name", "apex", "first_seen"), rows
+        if not arg:
+            raise ValueError(f"查询 {kind} 需要参数")
+        if kind == "apex":
+            rows = c.execute(
+                "SELECT name, first_seen, last_seen FROM subdomains WHERE apex = ? ORDER BY name",
+                (arg.lower(),)
+            ).fetchall()
+            return ("name", "first_seen", "last_seen"), rows
+        if kind == "ip":
+            rows = c.execute(
+                "SELECT name, rtype, first_seen, last_seen FROM records "
+                "WHERE value = ? AND rtype IN ('A', 'AAAA') ORDER BY name", (arg,)
+            ).fetchall()
+            return ("name", "rtype", "first_seen", "last_seen"), rows
+        if kind == "name":
+            rows = c.execute(
+                "SELECT rtype, value, first_seen, last_seen FROM records WHERE name = ? ORDER BY rtype, value",
+                (arg.lower(),)
+            ).fetchall()
+            sub = c.execute(
+                "SELECT apex, first_seen, last_seen FROM subdomains WHERE name = ?", (arg.lower(),)
+            ).fetchone()
+            if sub:
+                rows.insert(0, ("(subdomain)", sub[0], sub[1], sub[2]))
+            return ("rtype", "value", "first_seen", "last_seen"), rows
+        if kind == "http":
+            rows = c.execute(
+                "SELECT h.url, h.status, h.title, h.server, h.redirect, h.last_seen FROM http h "
+                "LEFT JOIN subdomains s ON s.name = h.host WHERE h.host = ? OR s.apex = ? ORDER BY h.url",
+                (arg.lower(), arg.lower())
+            ).fetchall()
+            return ("url", "status", "title", "server", "redirect", "last_seen"), rows
+        raise ValueError(f"未知查询类型: {kind}（可选: {', '.join(QUERY_KINDS)}）")
+
+
+def run_query(config: dict, words: list) -> int:
+    """--query 命令行入口：打印制表符分隔的结果，返回退出码"""
+    inv_cfg = config.get("inventory") or {}
+    path = Path(inv_cfg.get("path", "./inventory.db")).expanduser().resolve()
+    if not path.is_file():
+        logger.error(f"❌ 资产库不存在: {path}（在 config.yaml 中开启 inventory.enabled 后运行扫描）")
+        return 1
+    kind = words[0].lower()
+    if kind not in QUERY_KINDS:
+        logger.error(f"❌ 未知查询类型: {kind}（可选: {', '.join(QUERY_KINDS)}）")
+        return 1
+    arg = words[1] if len(words) > 1 else None
+    extra = words[2] if len(words) > 2 else None
+    try:
+        with Inventory(path) as inv:
+            headers, rows = inv.query(kind, arg, extra)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return 1
+    print("\t".join(headers))
+    for row in rows:
+        print("\t".join("" if v is None else str(v) for v in row))
+    return 0
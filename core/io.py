@@ -1,8 +1,8 @@
 # core/io.py
-import shutil
 from pathlib import Path
 from datetime import datetime
 from .utils import logger
+from .artifacts import link_or_copy
 
 
 def get_task_dirs(input_identifier: str, config: dict) -> tuple[Path, Path]:
@@ -50,10 +50,10 @@ def build_output_file(
 
 
 def copy_to_results(src: Path, result_dir: Path):
-    """将高价值文件复制到 results 目录"""
+    """将高价值文件放入 results 目录（同一文件系统上为硬链接，不占额外空间）"""
     try:
         dst = result_dir / src.name
-        shutil.copy2(src, dst)
+        link_or_copy(src, dst)
         logger.info(f"✅ 已复制至结果目录: {dst.name}")
     except Exception as e:
         logger.warning(f"⚠️  复制到 results 失败: {e}")
@@ -3,8 +3,11 @@ import re
 from datetime import datetime
 from pathlib import Path
 from .utils import logger
-from .parsing import extract_subdomains
+from .parsers import parse_tool_output, GENERIC
 from .io import copy_to_results
+from .artifacts import store_artifact, release, open_text
+from .scope import SuffixIndex
+from .progress import progress
 
 def generate_unique_prefixes(tool_names):
     tool_names = [name.lower() for name in tool_names]
@@ -32,7 +35,14 @@ def generate_unique_prefixes(tool_names):
 
     return result
 
-def merge_and_dedup(selected_tools, tool_output_map, input_identifier, log_dir: Path, result_dir: Path):
+def merge_and_dedup(selected_tools, tool_output_map, input_identifier, log_dir: Path, result_dir: Path, scope=None,
+                    contributions: dict = None, direct_results: dict = None, parsers: dict = None):
+    """
+    合并各工具结果并去重。
+    direct_results: {名称: 子域名集合}，进程内插件的结果直接并入，不再解析其存档文件。
+    parsers: {工具名: 解析器名}（见 parsers.parser_for），未列出的工具使用通用解析。
+    contributions 不为 None 时填入每个工具的贡献统计 {tool: {"found": n, "unique": 仅该工具发现的数量}}
+    """
     if not tool_output_map:
         logger.warning("⚠️  无有效结果可合并")
         return None
@@ -40,12 +50,36 @@ def merge_and_dedup(selected_tools, tool_output_map, input_identifier, log_dir:
     logger.info("🔄 正在合并并去重子域名结果...")
 
     all_subs = set()
+    out_of_scope = set() if scope is not None else None
+    owner = {}  # 名字 -> 唯一发现它的工具；被多个工具发现时为 None
     for tool_name, file_path in tool_output_map.items():
         if not file_path.exists():
             continue
-        subs = extract_subdomains(file_path)
-        logger.debug(f"  [{tool_name}] 提取 {len(subs)} 个有效子域名")
+        if direct_results and tool_name in direct_results:
+            subs = direct_results[tool_name]
+            if scope is not None:
+                in_scope = {sub for sub in subs if scope.match(sub) is not None}
+                out_of_scope.update(subs - in_scope)
+                subs = in_scope
+            logger.debug(f"  [{tool_name}] 插件结果 {len(subs)} 个有效子域名")
+        else:
+            parser_name = (parsers or {}).get(tool_name, GENERIC)
+            subs = parse_tool_output(file_path, parser_name, scope=scope, out_of_scope=out_of_scope)
+            logger.debug(f"  [{tool_name}] 提取 {len(subs)} 个有效子域名（解析器: {parser_name}）")
         all_subs.update(subs)
+        progress.merge_size(len(all_subs))
+        if contributions is not None:
+            contributions[tool_name] = {"found": len(subs), "unique": 0}
+            for sub in subs:
+                owner[sub] = tool_name if owner.get(sub, tool_name) == tool_name else None
+
+    if contributions is not None:
+        for tool_name in owner.values():
+            if tool_name is not None:
+                contributions[tool_name]["unique"] += 1
+
+    if out_of_scope:
+        logger.info(f"🧹 已丢弃 {len(out_of_scope)} 个范围外域名（不属于任何目标根域）")
 
     if not all_subs:
         logger.warning("⚠️  合并后无有效子域名")
@@ -62,15 +96,48 @@ def merge_and_dedup(selected_tools, tool_output_map, input_identifier, log_dir:
     # 先写入 logs 目录
     merged_path_in_logs = log_dir / merged_filename
     try:
-        with open(merged_path_in_logs, 'w', encoding='utf-8') as f:
+        with open(release(merged_path_in_logs), 'w', encoding='utf-8') as f:
             for sub in sorted(all_subs):
                 f.write(sub + '\n')
         logger.info(f"✅ 合并完成: {merged_path_in_logs.name} ({len(all_subs)} unique)")
+
+        if out_of_scope:
+            oos_path = log_dir / merged_filename.replace(".merged.txt", ".out_of_scope.txt")
+            with open(release(oos_path), 'w', encoding='utf-8') as f:
+                for sub in sorted(out_of_scope):
+                    f.write(sub + '\n')
+            oos_path = store_artifact(oos_path)
+            logger.debug(f"范围外域名已记录: {oos_path.name}")
         
-        # 再复制到 results 目录
+        # 再放入 results 目录（合并结果保持明文，仅做内容去重）
+        merged_path_in_logs = store_artifact(merged_path_in_logs, compress=False)
         copy_to_results(merged_path_in_logs, result_dir)
         return merged_path_in_logs
 
     except Exception as e:
         logger.error(f"❌ 写入合并文件失败: {e}")
-        return None
\ No newline at end of file
+        return None
+
+def write_target_attribution(merged_path: Path, targets: list, result_dir: Path, input_identifier: str):
+    """
+    按原始目标归属合并结果（目标最小化后工具只枚举上级根域，这里把结果还原到每个原始目标）：
+    每行「目标<TAB>子域名」，一个子域名属于多个目标时每个目标各一行。
+    """
+    index = SuffixIndex(targets)
+    by_target = {target: [] for target in targets}
+    with open_text(merged_path) as f:
+        for line in f:
+            name = line.strip()
+            if name:
+                for target in index.match_all(name):
+                    by_target[target].append(name)
+
+    safe_input = re.sub(r'[^\w.-]', '_', str(input_identifier))
+    output_path = result_dir / f"{safe_input}_by_target.tsv"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("target\tsubdomain\n")
+        for target, names in by_target.items():
+            for name in names:
+                f.write(f"{target}\t{name}\n")
+    logger.info(f"🧾 按目标归属: {output_path.name}（{sum(1 for names in by_target.values() if names)}/{len(targets)} 个目标有结果）")
+    return output_path
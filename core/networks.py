@@ -0,0 +1,243 @@
+# core/networks.py
+import bisect
+import ipaddress
+from array import array
+from pathlib import Path
+from .utils import logger
+from .dns_records import RecordStore, ADDRESS_TYPES
+
+# 未命中任何 CIDR 列表时按该前缀长度聚合网段
+FALLBACK_PREFIX = {4: 24, 6: 48}
+# By Network / By IP sheet 中每行最多列出的主机名
+SAMPLE_HOSTS = 20
+
+
+class PrefixTree:
+    """
+    多比特（8 位步长）前缀树，最长前缀匹配。
+    长度不是 8 的倍数的前缀在所在层展开（/13 展开为该层 8 个槽位），查询 IPv4 最多 4 次字典查找。
+    """
+
+    def __init__(self):
+        self._roots = {4: [{}, {}], 6: [{}, {}]}  # 版本 -> [子节点, 本层槽位 -> (前缀长度, 值)]
+        self._default = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def insert(self, network, value):
+        network = ipaddress.ip_network(network, strict=False)
+        plen = network.prefixlen
+        self._size += 1
+        if plen == 0:
+            self._default[network.version] = (0, network, value)
+            return
+        packed = network.network_address.packed
+        node = self._roots[network.version]
+        depth = (plen - 1) // 8
+        for byte in packed[:depth]:
+            node = node[0].setdefault(byte, [{}, {}])
+        spare = 8 * (depth + 1) - plen
+        base = packed[depth]
+        slots = node[1]
+        for byte in range(base, base + (1 << spare)):
+            current = slots.get(byte)
+            if current is None or current[0] <= plen:
+                slots[byte] = (plen, network, value)
+
+    def lookup(self, ip):
+        """返回 (网段, 值)，未命中返回 None"""
+        ip = ipaddress.ip_address(ip)
+        best = self._default.get(ip.version)
+        node = self._roots[ip.version]
+        for byte in ip.packed:
+            hit = node[1].get(byte)
+            if hit is not None:
+                best = hit
+            node = node[0].get(byte)
+            if node is None:
+                break
+        return (best[1], best[2]) if best is not None else None
+
+
+class AsnDatabase:
+    """
+    离线 ASN 库（iptoasn.com 的 ip2asn-v4.tsv / ip2asn-v6.tsv 格式：起始 IP、结束 IP、ASN、国家、描述）。
+    区间有序且不重叠，按起始地址二分查找，比展开成 CIDR 写入前缀树省内存。
+    """
+
+    def __init__(self):
+        self._starts = {4: array('I'), 6: []}
+        self._entries = {4: [], 6: []}
+
+    def __len__(self):
+        return sum(len(v) for v in self._entries.values())
+
+    @classmethod
+    def load(cls, path: Path):
+        db = cls()
+        rows = {4: [], 6: []}
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) < 3 or parts[0].startswith('#'):
+                    continue
+                try:
+                    start = ipaddress.ip_address(parts[0])
+                    end = ipaddress.ip_address(parts[1])
+                    asn = int(parts[2])
+                except ValueError:
+                    continue
+                if asn == 0:  # 未分配
+                    continue
+                country = parts[3] if len(parts) > 3 else ""
+                name = parts[4] if len(parts) > 4 else ""
+                rows[start.version].append((int(start), int(end), asn, country, name))
+        for version, items in rows.items():
+            items.sort()
+            db._starts[version].extend(item[0] for item in items)
+            db._entries[version] = [(end, asn, country, name) for _, end, asn, country, name in items]
+        return db
+
+    def lookup(self, ip):
+        """返回 (ASN, 国家, 描述)，未命中返回 None"""
+        ip = ipaddress.ip_address(ip)
+        starts = self._starts[ip.version]
+        i = bisect.bisect_right(starts, int(ip)) - 1
+        if i < 0:
+            return None
+        end, asn, country, name = self._entries[ip.version][i]
+        return (asn, country, name) if int(ip) <= end else None
+
+
+def load_cidr_lists(cidr_lists) -> PrefixTree:
+    """cidr_lists: [{name, path, cdn}]，文件每行一个 CIDR（# 注释）"""
+    tree = PrefixTree()
+    for entry in cidr_lists or []:
+        if not isinstance(entry, dict) or not entry.get("path"):
+            logger.warning(f"⚠️  networks.cidr_lists 条目格式错误（需要 name / path）: {entry}")
+            continue
+        path = Path(entry["path"]).expanduser()
+        label = (entry.get("name") or path.stem, bool(entry.get("cdn", False)))
+        loaded = 0
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                for line in f:
+                    line = line.split('#', 1)[0].strip()
+                    if not line:
+                        continue
+                    try:
+                        tree.insert(line, label)
+                        loaded += 1
+                    except ValueError:
+                        logger.debug(f"忽略无效 CIDR: {line}（{path.name}）")
+        except OSError as e:
+            logger.warning(f"⚠️  无法读取 CIDR 列表 {path}: {e}")
+            continue
+        logger.debug(f"已加载 CIDR 列表 [{label[0]}]: {loaded} 条")
+    return tree
+
+
+class NetworkAggregator:
+    """
+    DNS 结果按 IP / 网段聚合：IP -> 子域名反向索引，按本地 CIDR 列表（CDN / 云厂商）与可选离线 ASN 库分类，
+    生成 By IP / By Network / By Host 三个 sheet 与非 CDN 主机清单（便于对源站做端口扫描）。
+    """
+
+    def __init__(self, cfg: dict):
+        self.tree = load_cidr_lists(cfg.get("cidr_lists"))
+        self.asn_db = None
+        asn_path = cfg.get("asn_db")
+        if asn_path:
+            try:
+                self.asn_db = AsnDatabase.load(Path(asn_path).expanduser())
+                logger.info(f"🛰️  已加载离线 ASN 库: {len(self.asn_db)} 个区间")
+            except OSError as e:
+                logger.warning(f"⚠️  无法读取离线 ASN 库 {asn_path}: {e}")
+        self.cdn_hosts = set()
+
+    def _classify(self, ip: str) -> tuple:
+        """返回 (网段字符串, 归属名称, 是否 CDN, ASN 字符串)；未命中 CIDR 列表时归属名称为空，ASN 只放在 ASN 列"""
+        asn_text = ""
+        if self.asn_db is not None:
+            asn = self.asn_db.lookup(ip)
+            if asn is not None:
+                asn_text = f"AS{asn[0]} {asn[2]}".strip()
+        hit = self.tree.lookup(ip) if self.tree else None
+        if hit is not None:
+            network, (name, cdn) = hit
+            return str(network), name, cdn, asn_text
+        version = ipaddress.ip_address(ip).version
+        network = ipaddress.ip_network(f"{ip}/{FALLBACK_PREFIX[version]}", strict=False)
+        return str(network), "", False, asn_text
+
+    def run(self, store: RecordStore, result_dir: Path, input_identifier: str) -> list:
+        # IP -> 主机编号集合（IP 字符串在 RecordStore 中已驻留，重复记录不会放大内存）
+        by_ip = {}
+        for rtype in ADDRESS_TYPES:
+            col = store.columns[rtype]
+            for hid, ip in zip(col.host_ids, col.values):
+                by_ip.setdefault(ip, set()).add(hid)
+
+        hosts = store.hosts
+        ip_info = {}
+        networks = {}
+        host_ips = {}
+        for ip, hids in by_ip.items():
+            try:
+                network, label, cdn, asn = self._classify(ip)
+            except ValueError:
+                continue
+            ip_info[ip] = (network, label, cdn, asn)
+            # 网段的 ASN 取其中各 IP 的 ASN 并集（回退的 /24、/48 可能跨 ASN 边界）
+            net = networks.setdefault(network, [label, cdn, set(), set(), set()])
+            net[2].add(ip)
+            net[3].update(hids)
+            if asn:
+                net[4].add(asn)
+            for hid in hids:
+                host_ips.setdefault(hid, []).append(ip)
+
+        self.cdn_hosts = {hosts[hid] for hid, ips in host_ips.items() if any(ip_info[ip][2] for ip in ips)}
+        origin_hosts = sorted(hosts[hid] for hid in host_ips if hosts[hid] not in self.cdn_hosts)
+        logger.info(f"🛰️  IP 聚合: {len(ip_info)} 个 IP、{len(networks)} 个网段，"
+                    f"{len(self.cdn_hosts)} 个主机位于 CDN，{len(origin_hosts)} 个疑似源站")
+
+        non_cdn_path = result_dir / f"{input_identifier}_non_cdn.txt"
+        with open(non_cdn_path, 'w', encoding='utf-8') as f:
+            for host in origin_hosts:
+                f.write(host + '\n')
+        logger.info(f"🛰️  非 CDN 主机清单: {non_cdn_path.name}")
+
+        def sample(hids):
+            names = sorted(hosts[hid] for hid in hids)
+            text = ", ".join(names[:SAMPLE_HOSTS])
+            return text + (f" …（共 {len(names)} 个）" if len(names) > SAMPLE_HOSTS else "")
+
+        def ip_rows():
+            for ip in sorted(by_ip, key=lambda ip: (-len(by_ip[ip]), ip)):
+                if ip not in ip_info:
+                    continue
+                network, label, cdn, asn = ip_info[ip]
+                yield [ip, len(by_ip[ip]), "CDN" if cdn else "", label, network, asn, sample(by_ip[ip])]
+
+        def network_rows():
+            for network, (label, cdn, ips, hids, asns) in sorted(networks.items(), key=lambda kv: (-len(kv[1][3]), kv[0])):
+                yield [network, label, "CDN" if cdn else "", ", ".join(sorted(asns)), len(ips), len(hids), sample(hids)]
+
+        def host_rows():
+            for hid in sorted(host_ips, key=lambda hid: hosts[hid]):
+                ips = host_ips[hid]
+                cdn_names = sorted({ip_info[ip][1] for ip in ips if ip_info[ip][2]})
+                nets = sorted({ip_info[ip][0] for ip in ips})
+                yield [hosts[hid], ", ".join(sorted(ips)), ", ".join(cdn_names), ", ".join(nets)]
+
+        return [
+            ("By IP", ["IP", "Hosts", "CDN", "Provider", "Network", "ASN", "Subdomains"],
+             [40, 8, 6, 30, 20, 30, 80], ip_rows()),
+            ("By Network", ["Network", "Provider", "CDN", "ASN", "IPs", "Hosts", "Subdomains"],
+             [22, 30, 6, 30, 8, 8, 80], network_rows()),
+            ("By Host", ["Subdomain", "IPs", "CDN", "Networks"],
+             [40, 40, 20, 40], host_rows()),
+        ]
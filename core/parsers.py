@@ -0,0 +1,171 @@
+# core/parsers.py
+import csv
+import json
+import re
+from pathlib import Path
+from .utils import logger
+from .parsing import extract_hostname, is_valid_domain, extract_subdomains, first_token_names
+from .artifacts import open_text, logical_suffix
+
+GENERIC = "generic"
+
+# 解析器名称 -> 函数(file_path) -> 合法主机名集合
+PARSERS = {}
+
+# amass 图谱文本输出：「www.example.com (FQDN) --> cname_record --> edge.example.net (FQDN)」
+_AMASS_FQDN_RE = re.compile(r'(\S+) \(FQDN\)')
+
+
+def register(*names):
+    """注册专用解析器（可同时登记多个名字）"""
+    def decorator(func):
+        for name in names:
+            PARSERS[name] = func
+        return func
+    return decorator
+
+
+def _add(subs: set, raw: str):
+    candidate = extract_hostname(raw)
+    if candidate.startswith('*.'):
+        candidate = candidate[2:]
+    if is_valid_domain(candidate):
+        subs.add(candidate)
+
+
+def _first_line(file_path: Path) -> str:
+    with open_text(file_path) as f:
+        for line in f:
+            if line.strip():
+                return line.lstrip()
+    return ""
+
+
+@register("lines", "findomain", "assetfinder")
+def parse_lines(file_path: Path) -> set:
+    """每行一个主机名（findomain -u / assetfinder）"""
+    return first_token_names(file_path)
+
+
+@register("ksubdomain")
+def parse_ksubdomain(file_path: Path) -> set:
+    """
+    文本：「www.example.com => 1.2.3.4」或「a.example.com => CNAME b.example.net => ...」，取 => 左侧；
+    --output-type json：[{"subdomain": ..., "answers": [...]}]
+    """
+    if not _first_line(file_path).startswith('['):
+        return first_token_names(file_path)
+    subs = set()
+    with open_text(file_path) as f:
+        for item in json.load(f):
+            if isinstance(item, dict) and item.get("subdomain"):
+                _add(subs, str(item["subdomain"]))
+    return subs
+
+
+@register("subfinder")
+def parse_subfinder(file_path: Path) -> set:
+    """默认文本每行一个；-oJ 时为 JSON 行 {"host": ..., "source": ...}"""
+    if not _first_line(file_path).startswith('{'):
+        return first_token_names(file_path)
+    subs = set()
+    with open_text(file_path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                host = json.loads(line).get("host")
+            except (ValueError, AttributeError):
+                continue
+            if host:
+                _add(subs, str(host))
+    return subs
+
+
+@register("amass")
+def parse_amass(file_path: Path) -> set:
+    """
+    amass v4 图谱文本（提取每行所有 (FQDN) 节点，CNAME / NS 目标也一并收集，由范围过滤决定去留）、
+    JSON 行（{"name": ...}）或旧版每行一个名字
+    """
+    subs = set()
+    with open_text(file_path) as f:
+        for line in f:
+            if '(FQDN)' in line:
+                for raw in _AMASS_FQDN_RE.findall(line):
+                    _add(subs, raw)
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith('{'):
+                try:
+                    name = json.loads(line).get("name")
+                except (ValueError, AttributeError):
+                    continue
+                if name:
+                    _add(subs, str(name))
+            else:
+                _add(subs, line.split(None, 1)[0])
+    return subs
+
+
+@register("oneforall")
+def parse_oneforall(file_path: Path) -> set:
+    """
+    OneForAll 单域名模式导出的 CSV：按表头定位 subdomain 列，逐行流式读取（无需 Sniffer / 列猜测）；
+    多域名模式输出的是每行一个名字的 txt
+    """
+    if logical_suffix(file_path) == '.txt':
+        return first_token_names(file_path)
+    subs = set()
+    with open_text(file_path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return subs
+        columns = [cell.strip().lower() for cell in header]
+        if "subdomain" not in columns:
+            raise ValueError("CSV 表头中没有 subdomain 列")
+        index = columns.index("subdomain")
+        for row in reader:
+            if index < len(row) and row[index]:
+                _add(subs, row[index])
+    return subs
+
+
+def parser_for(tool_name: str, tool_cfg: dict) -> str:
+    """工具配置中的 parser 字段优先，其次按工具名匹配专用解析器，否则使用通用解析"""
+    name = (tool_cfg or {}).get("parser") if isinstance(tool_cfg, dict) else None
+    if name:
+        if name == GENERIC or name in PARSERS:
+            return name
+        logger.warning(f"⚠️  工具 '{tool_name}' 配置了未知解析器 '{name}'，改用通用解析（可选: {', '.join(sorted(PARSERS))}）")
+        return GENERIC
+    return tool_name if tool_name in PARSERS else GENERIC
+
+
+def parse_tool_output(file_path: Path, parser_name: str = GENERIC, scope=None, out_of_scope: set = None) -> set:
+    """
+    用指定解析器提取子域名，语义同 extract_subdomains（范围过滤 / 范围外名字记录）。
+    专用解析器失败（格式与预期不符）时退回通用解析。
+    """
+    parser = PARSERS.get(parser_name)
+    if parser is None:
+        return extract_subdomains(file_path, scope=scope, out_of_scope=out_of_scope)
+    try:
+        names = parser(file_path)
+    except Exception as e:
+        logger.warning(f"⚠️  [{parser_name}] 解析器无法解析 {file_path.name}（{e}），改用通用解析")
+        return extract_subdomains(file_path, scope=scope, out_of_scope=out_of_scope)
+
+    if scope is None:
+        return names
+    subs = set()
+    for name in names:
+        if scope.match(name) is not None:
+            subs.add(name)
+        elif out_of_scope is not None:
+            out_of_scope.add(name)
+    return subs
@@ -1,9 +1,31 @@
 # core/parsing.py
+import os
 import re
 import csv
+import mmap
 import ipaddress
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from .utils import logger
+from .artifacts import compression_of, logical_suffix, open_text, open_binary
+
+# 超过该大小的 .txt 走 mmap 字节扫描；超过并行阈值时按行对齐切块交给多进程
+MMAP_SCAN_THRESHOLD = 1 * 1024 * 1024
+PARALLEL_SCAN_THRESHOLD = 256 * 1024 * 1024
+PARALLEL_CHUNK_SIZE = 128 * 1024 * 1024
+_SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+_DOMAIN_RE = re.compile(r'^[a-zA-Z0-9]([a-zA-Z0-9\-]*[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]*[a-zA-Z0-9])?)*$')
+# 已小写的 ASCII 块上一次性完成「取行首 token → 去协议/路径/端口/末尾点 → 域名校验」，
+# 只捕获合法主机名；长度与纯 IPv4 判定留给 _accept_name
+_LABEL = rb'[a-z0-9](?:[a-z0-9\-]*[a-z0-9])?'
+_FIRST_TOKEN_HOST_RE = re.compile(
+    rb'(?m)^[ \t\x0b\x0c]*(?:https?://|(?!https?://))(' + _LABEL + rb'(?:\.' + _LABEL + rb')*)\.?'
+    rb'(?:[:/][^ \t\n\x0b\x0c]*)?(?=[ \t\x0b\x0c]|$)'
+)
+# str.split() 视为空白、bytes.split() 却不认的字符，以及需要换行转换的 \r
+_TEXT_ONLY_BREAKS_RE = re.compile(rb'[\r\x1c-\x1f]')
+_IPV4_CHARS = b'0123456789.'
 
 def extract_hostname(raw: str) -> str:
     s = raw.strip().lower()
@@ -28,7 +50,138 @@ def is_valid_domain(s: str) -> bool:
     except ValueError:
         pass
     
-    return re.match(r'^[a-zA-Z0-9]([a-zA-Z0-9\-]*[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]*[a-zA-Z0-9])?)*$', s) is not None
+    return _DOMAIN_RE.match(s) is not None
+
+def _accept_name(s: bytes):
+    """正则已保证标签格式，这里补齐长度与 IP 判定，通过后才解码"""
+    if len(s) > 253:
+        return None
+    if not s.translate(None, _IPV4_CHARS):
+        # 纯数字与点：交给 ipaddress 判定，保持与 str 路径完全一致
+        try:
+            ipaddress.ip_address(s.decode('ascii'))
+            return None
+        except ValueError:
+            pass
+    return s.decode('ascii')
+
+def _scan_block(block: bytes, subs: set):
+    """扫描按行对齐的数据块，结果与逐行 str 解析一致"""
+    if block.isascii() and _TEXT_ONLY_BREAKS_RE.search(block) is None:
+        for raw in set(_FIRST_TOKEN_HOST_RE.findall(block.lower())):
+            name = _accept_name(raw)
+            if name is not None:
+                subs.add(name)
+        return
+    # 含非 ASCII / \r / 特殊空白的块：退回与文本模式相同的解码路径
+    text = block.decode('utf-8', errors='ignore').replace('\r\n', '\n').replace('\r', '\n')
+    for line in text.split('\n'):
+        parts = line.strip().split()
+        if not parts:
+            continue
+        candidate = extract_hostname(parts[0])
+        if is_valid_domain(candidate):
+            subs.add(candidate)
+
+def _scan_range(file_path: str, start: int, end: int) -> set:
+    """mmap 扫描文件的 [start, end) 区间，区间边界须在行首"""
+    subs = set()
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = start
+            while pos < end:
+                stop = min(pos + _SCAN_BLOCK_SIZE, end)
+                if stop < end:
+                    newline = mm.rfind(b'\n', pos, stop)
+                    if newline != -1:
+                        stop = newline + 1
+                    else:
+                        # 超长行：延伸到下一个换行
+                        newline = mm.find(b'\n', stop, end)
+                        stop = end if newline == -1 else newline + 1
+                _scan_block(mm[pos:stop], subs)
+                pos = stop
+    return subs
+
+def _line_aligned_ranges(file_path: Path, size: int, parts: int) -> list:
+    """把文件切成 parts 段，每段起点对齐到行首"""
+    bounds = [0]
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for i in range(1, parts):
+                newline = mm.find(b'\n', max(size * i // parts, bounds[-1]))
+                if newline == -1:
+                    break
+                bounds.append(newline + 1)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+def scan_txt_mmap(file_path: Path, workers: int = None) -> set:
+    """
+    以 mmap 字节扫描纯文本输出，只对通过校验的名字解码；结果与逐行 str 解析完全一致。
+    workers 为 None 时按文件大小自动决定进程数，1 表示单进程。
+    """
+    size = file_path.stat().st_size
+    if size == 0:
+        return set()
+    if workers is None:
+        workers = 1
+        if size >= PARALLEL_SCAN_THRESHOLD:
+            workers = max(1, min(os.cpu_count() or 1, size // PARALLEL_CHUNK_SIZE))
+    if workers <= 1:
+        return _scan_range(str(file_path), 0, size)
+
+    ranges = _line_aligned_ranges(file_path, size, workers)
+    logger.debug(f"并行扫描 {file_path.name}: {len(ranges)} 段 / {workers} 进程")
+    subs = set()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_scan_range, str(file_path), start, end) for start, end in ranges]
+        for future in futures:
+            subs.update(future.result())
+    return subs
+
+def scan_txt_stream(file_path: Path) -> set:
+    """
+    压缩产物的字节扫描：解压流按 _SCAN_BLOCK_SIZE 读取，在最后一个换行处切块，余下的半行并入下一块。
+    与 mmap 路径共用 _scan_block，结果一致。
+    """
+    subs = set()
+    carry = b''
+    with open_binary(file_path) as f:
+        while True:
+            chunk = f.read(_SCAN_BLOCK_SIZE)
+            if not chunk:
+                break
+            block = carry + chunk
+            newline = block.rfind(b'\n')
+            if newline == -1:
+                carry = block  # 超长行：继续读到换行为止
+                continue
+            carry = block[newline + 1:]
+            _scan_block(block[:newline + 1], subs)
+    if carry:
+        _scan_block(carry, subs)
+    return subs
+
+def first_token_names(file_path: Path) -> set:
+    """
+    每行取第一个空白分隔的 token 作为主机名（纯文本输出的通用规则）。
+    大文件走 mmap 扫描，压缩产物（默认配置下的工具原始输出）走解压流的按块扫描。
+    """
+    if compression_of(file_path) is not None:
+        return scan_txt_stream(file_path)
+    if file_path.stat().st_size >= MMAP_SCAN_THRESHOLD:
+        return scan_txt_mmap(file_path)
+    subs = set()
+    with open_text(file_path) as f:
+        for line in f:
+            parts = line.split(None, 1)
+            if not parts:
+                continue
+            candidate = extract_hostname(parts[0])
+            if is_valid_domain(candidate):
+                subs.add(candidate)
+    return subs
 
 def _guess_domain_column(rows: list, max_sample_rows: int = 20) -> int:
     if not rows:
@@ -59,23 +212,29 @@ def _guess_domain_column(rows: list, max_sample_rows: int = 20) -> int:
 
     return best_col if best_ratio > 0 else 0
 
-def extract_subdomains(file_path: Path):
+def extract_subdomains(file_path: Path, scope=None, out_of_scope: set = None):
+    """
+    从工具输出文件提取子域名。
+    scope 为 SuffixIndex 时仅保留目标根域下的名字，范围外的名字写入 out_of_scope（若提供）。
+    """
     subs = set()
-    suffix = file_path.suffix.lower()
+    suffix = logical_suffix(file_path)
+
+    if scope is None:
+        collect = subs.add
+    else:
+        def collect(name):
+            if scope.match(name) is not None:
+                subs.add(name)
+            elif out_of_scope is not None:
+                out_of_scope.add(name)
 
     try:
         if suffix == '.txt':
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    parts = line.strip().split()
-                    if not parts:
-                        continue
-                    raw_value = parts[0]
-                    candidate = extract_hostname(raw_value)
-                    if is_valid_domain(candidate):
-                        subs.add(candidate)
+            for candidate in first_token_names(file_path):
+                collect(candidate)
         elif suffix == '.csv':
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with open_text(file_path) as f:
                 lines = [line.strip() for line in f if line.strip()]
                 if not lines:
                     return set()
@@ -115,7 +274,7 @@ def extract_subdomains(file_path: Path):
                         if raw_val:
                             candidate = extract_hostname(raw_val)
                             if is_valid_domain(candidate):
-                                subs.add(candidate)
+                                collect(candidate)
         else:
             logger.warning(f"⚠️  不支持的文件格式: {file_path.suffix}，跳过解析")
             return set()
@@ -0,0 +1,279 @@
+# core/permutation.py
+import hashlib
+import itertools
+import math
+import os
+import re
+import struct
+from pathlib import Path
+from .utils import logger
+from .dns_records import RecordStore, ADDRESS_TYPES
+
+STATE_NAME = ".permutation.bloom"
+_STATE_MAGIC = b"S1BF"
+_STATE_HEADER = struct.Struct("<4sQIQ")  # magic, 位数, 哈希函数个数, 已加入数量
+
+_NUMBER_RE = re.compile(r'\d+')
+# 候选由合法名字变换而来，只需校验新标签；比 is_valid_domain 省去 IP 判断，适合千万级候选
+_CANDIDATE_RE = re.compile(r'(?:(?!-)[a-z0-9_-]{1,63}(?<!-)\.)+[a-z0-9-]{2,63}')
+
+# 未配置 wordlist 时使用的常见环境 / 服务词
+DEFAULT_WORDS = (
+    "dev", "test", "qa", "uat", "stage", "staging", "prod", "pre", "beta", "demo",
+    "api", "admin", "internal", "intranet", "vpn", "mail", "app", "portal", "static",
+    "cdn", "img", "m", "mobile", "old", "new", "backup", "v1", "v2", "gw", "auth",
+    "sso", "login", "dashboard", "monitor", "git", "jenkins", "ci", "db", "web", "www",
+)
+
+
+class BloomFilter:
+    """
+    定长位数组布隆过滤器（bytearray + blake2b 双重哈希），哈希稳定，可落盘跨任务复用。
+    只会误判「已存在」而不会漏判：误判的候选不会被解析，不会产生错误结果。
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytearray = None, count: int = 0):
+        self.num_bits = max(8, num_bits)
+        self.num_hashes = max(1, num_hashes)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    @classmethod
+    def for_budget(cls, memory_bytes: int, expected_items: int):
+        """按内存预算定位数，按预期元素数取最优哈希个数 k = m/n·ln2（上限 10，预算宽裕时不必多算哈希）"""
+        num_bits = max(8, int(memory_bytes) * 8)
+        k = round(num_bits / max(1, expected_items) * math.log(2))
+        return cls(num_bits, min(10, max(1, k)))
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """加入元素；此前（可能）已存在时返回 False"""
+        bits = self.bits
+        added = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not bits[p >> 3] & mask:
+                bits[p >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def union(self, other: "BloomFilter"):
+        """按位并入同规格的过滤器（整数按位或，32MB 位数组也只需毫秒级）"""
+        if (other.num_bits, other.num_hashes) != (self.num_bits, self.num_hashes):
+            raise ValueError("布隆过滤器规格不一致，无法合并")
+        size = len(self.bits)
+        merged = int.from_bytes(self.bits, 'little') | int.from_bytes(other.bits, 'little')
+        self.bits[:] = merged.to_bytes(size, 'little')
+        self.count += other.count
+
+    def false_positive_rate(self) -> float:
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def save(self, path: Path):
+        tmp_path = Path(path).with_name(Path(path).name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(_STATE_HEADER.pack(_STATE_MAGIC, self.num_bits, self.num_hashes, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path):
+        with open(path, 'rb') as f:
+            magic, num_bits, num_hashes, count = _STATE_HEADER.unpack(f.read(_STATE_HEADER.size))
+            if magic != _STATE_MAGIC:
+                raise ValueError(f"不是有效的布隆过滤器文件: {path}")
+            bits = bytearray(f.read())
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError(f"布隆过滤器文件已损坏: {path}")
+        return cls(num_bits, num_hashes, bits, count)
+
+
+def load_words(path) -> list:
+    """读取词表（每行一个，忽略空行与 # 注释），未配置时返回内置词表"""
+    if not path:
+        return list(DEFAULT_WORDS)
+    words = {}
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            word = line.strip().lower()
+            if word and not word.startswith('#'):
+                words.setdefault(word, None)
+    return list(words)
+
+
+def _split_apex(name: str, scope) -> tuple:
+    """拆成 (子域标签列表, 根域)；无范围索引时取最后两级作为根域"""
+    apex = scope.match(name) if scope is not None else None
+    if apex is None:
+        apex = '.'.join(name.split('.')[-2:])
+    sub = name[:-len(apex)].rstrip('.')
+    return (sub.split('.') if sub else []), apex
+
+
+def _insertions(labels: list, words: list):
+    """插入新标签（dev.api / api.dev）以及与已有标签用连字符拼接（dev-api / api-dev）"""
+    for word in words:
+        for i in range(len(labels) + 1):
+            yield labels[:i] + [word] + labels[i:]
+        for i, label in enumerate(labels):
+            yield labels[:i] + [f"{word}-{label}"] + labels[i + 1:]
+            yield labels[:i] + [f"{label}-{word}"] + labels[i + 1:]
+
+
+def _number_variants(labels: list, span: int):
+    """标签中的数字递增 / 递减（保留前导零宽度）：api2 -> api1, api3 ..."""
+    for i, label in enumerate(labels):
+        for match in _NUMBER_RE.finditer(label):
+            digits = match.group()
+            value = int(digits)
+            for delta in itertools.chain(range(1, span + 1), range(-1, -span - 1, -1)):
+                new_value = value + delta
+                if new_value < 0:
+                    continue
+                replaced = str(new_value).zfill(len(digits))
+                yield labels[:i] + [label[:match.start()] + replaced + label[match.end():]] + labels[i + 1:]
+
+
+def _swaps(labels: list, words: list, word_set: set):
+    """标签（或其连字符分段）本身是词表中的词时，替换为其他词：dev-api -> test-api"""
+    for i, label in enumerate(labels):
+        tokens = label.split('-')
+        for j, token in enumerate(tokens):
+            if token not in word_set:
+                continue
+            for word in words:
+                if word != token:
+                    new_label = '-'.join(tokens[:j] + [word] + tokens[j + 1:])
+                    yield labels[:i] + [new_label] + labels[i + 1:]
+
+
+class Permuter:
+    """
+    基于已知子域名生成排列组合候选（惰性流式）：插入词、数字增减、词替换。
+    已知名字与历次尝试过的候选都记入布隆过滤器，只输出从未尝试过的候选。
+    """
+
+    def __init__(self, perm_cfg: dict, scope=None, state_path: Path = None):
+        self.words = load_words(perm_cfg.get("wordlist"))
+        self.word_set = set(self.words)
+        self.number_span = int(perm_cfg.get("number_span", 3))
+        self.max_candidates = int(perm_cfg.get("max_candidates", 0) or 0)
+        self.batch_size = max(1, int(perm_cfg.get("batch_size", 50000)))
+        self.wildcard_threshold = int(perm_cfg.get("wildcard_threshold", 20))
+        self.scope = scope
+        self.state_path = Path(state_path) if state_path else None
+        self.generated = 0
+        self.discovered = []
+
+        self.bloom = None
+        if self.state_path is not None and self.state_path.is_file():
+            try:
+                self.bloom = BloomFilter.load(self.state_path)
+                logger.info(f"🧮 已加载历史候选过滤器: {self.state_path.name}（{self.bloom.count} 条）")
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"⚠️  无法读取历史候选过滤器，将重新开始: {e}")
+        if self.bloom is None:
+            memory_mb = float(perm_cfg.get("memory_mb", 32))
+            expected = self.max_candidates or 20_000_000
+            self.bloom = BloomFilter.for_budget(int(memory_mb * 1024 * 1024), expected)
+        # 本次任务中已得到确定应答的候选：与历史过滤器同规格，阶段完成后按位并入历史再落盘。
+        # 中途失败则历史不变，续跑时这些候选会重新生成，命中不会因「已尝试」而永久丢失。
+        self.session = BloomFilter(self.bloom.num_bits, self.bloom.num_hashes)
+        self._pending = set()   # 已产出、尚未解析完成的候选（当前批次）
+        self._given_up = set()  # 多次尝试仍超时 / 出错的候选：本次不再生成，也不记入历史
+
+    def _variants(self, name: str):
+        labels, apex = _split_apex(name, self.scope)
+        for new_labels in itertools.chain(
+            _insertions(labels, self.words),
+            _number_variants(labels, self.number_span),
+            _swaps(labels, self.words, self.word_set),
+        ):
+            yield '.'.join(new_labels + [apex])
+
+    def candidates(self, names: list):
+        """
+        惰性产出去重后的候选；names 为已知名字，会先全部记入本次过滤器。
+        候选在所在批次解析完成（settle）后才记入过滤器：批次是在上一批解析完之后才生成的，
+        生成时只需再排除当前批次内的重复。
+        """
+        for name in names:
+            self.session.add(name)
+        bloom, session, pending, given_up = self.bloom, self.session, self._pending, self._given_up
+        limit = self.max_candidates
+        for name in names:
+            for candidate in self._variants(name):
+                if (len(candidate) > 253 or not _CANDIDATE_RE.fullmatch(candidate) or candidate in pending
+                        or candidate in bloom or candidate in session or candidate in given_up):
+                    continue
+                pending.add(candidate)
+                self.generated += 1
+                yield candidate
+                if limit and self.generated >= limit:
+                    logger.info(f"🧮 候选数已达上限 {limit}，停止生成")
+                    return
+
+    def batches(self, names: list):
+        """按批产出候选；调用方解析完一批后须先 settle 再取下一批"""
+        stream = self.candidates(names)
+        while True:
+            batch = list(itertools.islice(stream, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def settle(self, batch: list, given_up: set = frozenset()):
+        """一批解析完成：得到确定应答的候选记入本次过滤器，放弃的候选不记入（下次任务还会再试）"""
+        for candidate in batch:
+            self._pending.discard(candidate)
+            if candidate in given_up:
+                self._given_up.add(candidate)
+            else:
+                self.session.add(candidate)
+
+    def drop_wildcards(self, store: RecordStore) -> set:
+        """
+        泛解析过滤：同一根域下超过阈值个候选解析到完全相同的地址集合，视为泛解析命中并丢弃。
+        返回保留的主机集合。
+        """
+        addresses = {}
+        for rtype in ADDRESS_TYPES:
+            for host, value, _, _ in store.rows(rtype):
+                addresses.setdefault(host, set()).add(value)
+        groups = {}
+        for host, values in addresses.items():
+            key = (_split_apex(host, self.scope)[1], frozenset(values))
+            groups.setdefault(key, []).append(host)
+        kept = set()
+        for (apex, _), hosts in groups.items():
+            if self.wildcard_threshold and len(hosts) > self.wildcard_threshold:
+                logger.warning(f"⚠️  {apex} 疑似泛解析：{len(hosts)} 个候选解析到相同地址，已丢弃")
+                continue
+            kept.update(hosts)
+        return kept
+
+    def save_state(self):
+        """
+        本次已解析的候选并入历史过滤器并落盘。须在命中写入结果（*_permuted.txt）之后调用，
+        否则中断时历史已标记「尝试过」而命中尚未保存。
+        """
+        self.bloom.union(self.session)
+        self.session = BloomFilter(self.bloom.num_bits, self.bloom.num_hashes)
+        if self.state_path is None:
+            return
+        try:
+            self.bloom.save(self.state_path)
+        except OSError as e:
+            logger.warning(f"⚠️  保存候选过滤器失败: {e}")
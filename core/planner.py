@@ -0,0 +1,172 @@
+# core/planner.py
+import json
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from .utils import logger
+
+HISTORY_NAME = ".history.jsonl"
+
+# 每个工具只参考最近若干次运行，让统计跟上工具版本 / API 配额的变化
+HISTORY_WINDOW = 20
+# 无历史的工具：按每个目标 120 秒估算耗时，收益取已知工具的最大值（鼓励试跑）
+DEFAULT_SECONDS_PER_TARGET = 120.0
+# 与其他工具重叠的名字只有在那些工具未被选中时才有价值，按此权重计入收益
+OVERLAP_WEIGHT = 0.2
+# 最近连续失败达到该次数的工具暂停自动选择；冷却期过后重新试跑一次，再失败则冷却期加倍（上限 7 天）
+MAX_CONSECUTIVE_FAILURES = 3
+FAILURE_COOLDOWN = timedelta(hours=24)
+MAX_FAILURE_COOLDOWN = timedelta(days=7)
+
+
+def history_path(config: dict) -> Path:
+    logs_dir = Path((config.get("output") or {}).get("logs_dir", "./logs")).resolve()
+    return logs_dir / HISTORY_NAME
+
+
+def parse_budget(text: str) -> float:
+    """解析时间预算：'90'、'90s'、'30m'、'2h'、'1h30m' → 秒"""
+    text = str(text).strip().lower()
+    if re.fullmatch(r'\d+(\.\d+)?', text):
+        return float(text)
+    parts = re.findall(r'(\d+(?:\.\d+)?)\s*([hms])', text)
+    if not parts or ''.join(n + u for n, u in parts) != re.sub(r'\s+', '', text):
+        raise ValueError(f"无法解析时间预算: {text}（示例: 900 / 30m / 2h / 1h30m）")
+    scale = {"h": 3600, "m": 60, "s": 1}
+    return sum(float(n) * scale[u] for n, u in parts)
+
+
+def record_runs(path: Path, target_type: str, n_targets: int, runs: dict, contributions: dict):
+    """
+    追加本次运行的工具统计。
+    runs: {tool: (elapsed 秒, 是否成功)}；contributions: {tool: {"found": n, "unique": m}}
+    """
+    ts = datetime.now().isoformat(timespec="seconds")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for tool, (elapsed, ok) in runs.items():
+                contrib = contributions.get(tool, {})
+                f.write(json.dumps({
+                    "ts": ts,
+                    "tool": tool,
+                    "target_type": target_type,
+                    "targets": n_targets,
+                    "elapsed": round(elapsed, 1),
+                    "ok": ok,
+                    "found": contrib.get("found", 0),
+                    "unique": contrib.get("unique", 0),
+                }, ensure_ascii=False) + '\n')
+    except Exception as e:
+        logger.warning(f"⚠️  写入运行历史失败: {e}")
+
+
+class ToolStats:
+    """单个工具的历史统计（按每个目标归一化）"""
+
+    def __init__(self, tool: str, entries: list):
+        self.tool = tool
+        self.runs = len(entries)
+        ok_entries = [e for e in entries if e.get("ok")]
+        self.success_rate = len(ok_entries) / self.runs if self.runs else 0.0
+        per_target = lambda e, key: e.get(key, 0) / max(1, e.get("targets", 1))
+        # 失败也消耗时间，耗时取全部运行的均值
+        self.seconds_per_target = sum(per_target(e, "elapsed") for e in entries) / self.runs
+        n_ok = max(1, len(ok_entries))
+        self.unique_per_target = sum(per_target(e, "unique") for e in ok_entries) / n_ok
+        self.found_per_target = sum(per_target(e, "found") for e in ok_entries) / n_ok
+        self.consecutive_failures = 0
+        for e in reversed(entries):
+            if e.get("ok"):
+                break
+            self.consecutive_failures += 1
+        try:
+            self.last_run = datetime.fromisoformat(entries[-1]["ts"]) if entries else None
+        except (KeyError, TypeError, ValueError):
+            self.last_run = None
+
+    def excluded_until(self):
+        """连续失败的冷却截止时间，未被排除时返回 None"""
+        if self.consecutive_failures < MAX_CONSECUTIVE_FAILURES or self.last_run is None:
+            return None
+        extra = min(self.consecutive_failures - MAX_CONSECUTIVE_FAILURES, 8)
+        return self.last_run + min(FAILURE_COOLDOWN * (2 ** extra), MAX_FAILURE_COOLDOWN)
+
+    def expected_yield(self, n_targets: int) -> float:
+        overlap = max(0.0, self.found_per_target - self.unique_per_target)
+        return self.success_rate * (self.unique_per_target + OVERLAP_WEIGHT * overlap) * n_targets
+
+    def expected_seconds(self, n_targets: int) -> float:
+        return self.seconds_per_target * n_targets
+
+
+def load_stats(path: Path, target_type: str) -> dict:
+    """读取历史，优先使用同类目标（单域名 / 多域名）的记录，没有时退回全部记录"""
+    by_tool, by_tool_any = {}, {}
+    if path.is_file():
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                tool = entry.get("tool")
+                if not tool:
+                    continue
+                by_tool_any.setdefault(tool, []).append(entry)
+                if entry.get("target_type") == target_type:
+                    by_tool.setdefault(tool, []).append(entry)
+    stats = {}
+    for tool, entries in by_tool_any.items():
+        chosen = by_tool.get(tool) or entries
+        stats[tool] = ToolStats(tool, chosen[-HISTORY_WINDOW:])
+    return stats
+
+
+def plan_tools(candidates: list, stats: dict, n_targets: int, budget: float = None) -> list:
+    """
+    在时间预算内挑选期望独有收益最大的工具组合，按「收益 / 耗时」从高到低排序（便宜高产的先跑）。
+    budget 为 None 时不限时，仅剔除近期连续失败（仍在冷却期内）的工具。
+    无历史工具的耗时只是估算：若没有一个能放进预算，仍按配置顺序试跑一个，否则历史永远建立不起来。
+    """
+    n_targets = max(1, n_targets)
+    now = datetime.now()
+    known_yields = [s.expected_yield(n_targets) for t, s in stats.items() if t in candidates and s.runs]
+    optimistic_yield = max(known_yields, default=1.0) or 1.0
+
+    plans = []
+    for tool in candidates:
+        s = stats.get(tool)
+        if s is None:
+            plans.append((tool, optimistic_yield, DEFAULT_SECONDS_PER_TARGET * n_targets, "无历史"))
+            continue
+        until = s.excluded_until()
+        if until is not None and until > now:
+            logger.info(f"  ✗ [{tool}] 最近连续失败 {s.consecutive_failures} 次，"
+                        f"{until:%m-%d %H:%M} 前不再自动选择")
+            continue
+        note = f"成功率 {s.success_rate:.0%}，{s.runs} 次历史"
+        plans.append((tool, s.expected_yield(n_targets), max(1.0, s.expected_seconds(n_targets)), note))
+
+    plans.sort(key=lambda p: p[1] / p[2], reverse=True)
+
+    selected, spent = [], 0.0
+    unexplored = []
+    for tool, exp_yield, seconds, note in plans:
+        if budget is not None and spent + seconds > budget:
+            logger.info(f"  ✗ [{tool}] 预计 {seconds:.0f}s，超出剩余预算 {budget - spent:.0f}s")
+            if tool not in stats:
+                unexplored.append(tool)
+            continue
+        spent += seconds
+        selected.append(tool)
+        logger.info(f"  ✓ [{tool}] 预计收益 {exp_yield:.0f}，耗时 {seconds:.0f}s（{note}）")
+
+    if unexplored and not any(tool not in stats for tool in selected):
+        tool = unexplored[0]
+        selected.append(tool)
+        logger.info(f"  ✓ [{tool}] 无历史，耗时未知，试跑一次以建立统计")
+
+    if budget is not None:
+        logger.info(f"🧮 计划耗时约 {spent:.0f}s / 预算 {budget:.0f}s")
+    return selected
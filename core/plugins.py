@@ -0,0 +1,149 @@
+# core/plugins.py
+import asyncio
+import importlib
+import time
+from pathlib import Path
+from .utils import logger
+from .parsing import extract_hostname, is_valid_domain
+from .io import build_output_file
+from .artifacts import store_artifact, release
+from .http_client import AsyncHTTPClient, TRANSPORT_ERRORS
+from .progress import progress
+
+
+class RateLimiter:
+    """令牌桶：rate 为每秒请求数，<=0 表示不限速"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate or 0)
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PluginContext:
+    """
+    传给插件协程的上下文：共享的 HTTP 连接池（按本插件限速）、插件配置与日志。
+    插件签名: async def enumerate(domain: str, ctx: PluginContext) -> AsyncIterator[str]
+    """
+
+    def __init__(self, name: str, client: AsyncHTTPClient, limiter: RateLimiter, options: dict):
+        self.name = name
+        self.client = client
+        self.limiter = limiter
+        self.options = options
+        self.logger = logger
+        self.timeout = float(options.get("timeout", 30))
+
+    async def get(self, url: str, **kwargs):
+        await self.limiter.acquire()
+        kwargs.setdefault("timeout", self.timeout)
+        kwargs.setdefault("follow_redirects", True)
+        return await self.client.get(url, **kwargs)
+
+
+def load_plugins(config: dict, reserved_names=()) -> dict:
+    """读取 config.yaml 中的 plugin_enumerators，返回 {名称: 配置}（已校验 entry 字段）"""
+    plugins_cfg = config.get("plugin_enumerators") or {}
+    if not isinstance(plugins_cfg, dict):
+        logger.warning("⚠️  'plugin_enumerators' 应为字典，已忽略")
+        return {}
+    plugins = {}
+    for name, cfg in plugins_cfg.items():
+        if not isinstance(cfg, dict) or not cfg.get("entry"):
+            logger.warning(f"⚠️  插件 '{name}' 缺少 'entry' 字段（形如 module.path:function），跳过...")
+            continue
+        if name in reserved_names:
+            logger.warning(f"⚠️  插件 '{name}' 与外部工具重名，跳过...")
+            continue
+        plugins[name] = cfg
+    return plugins
+
+
+def _resolve_entry(entry: str):
+    module_name, _, func_name = entry.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, func_name or "enumerate")
+
+
+async def _run_source(ctx: PluginContext, func, targets: list, concurrency: int):
+    """对所有目标运行一个插件；单个目标失败只记日志。返回 (名字集合, 是否至少一个目标成功)"""
+    subs = set()
+    succeeded = 0
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(domain):
+        nonlocal succeeded
+        async with semaphore:
+            try:
+                async for raw in func(domain, ctx):
+                    candidate = extract_hostname(str(raw))
+                    if candidate.startswith('*.'):
+                        candidate = candidate[2:]
+                    if is_valid_domain(candidate) and candidate not in subs:
+                        subs.add(candidate)
+                        progress.tool_add(ctx.name)
+                succeeded += 1
+            except TRANSPORT_ERRORS as e:
+                logger.warning(f"⚠️  [{ctx.name}] {domain} 请求失败: {e or type(e).__name__}")
+            except Exception as e:
+                logger.warning(f"⚠️  [{ctx.name}] {domain} 插件异常: {type(e).__name__}: {e}")
+
+    await asyncio.gather(*(one(domain) for domain in targets))
+    return subs, succeeded > 0
+
+
+async def _run_all(selected: dict, targets: list):
+    results = {}
+    async with AsyncHTTPClient() as client:
+        async def timed(name, cfg):
+            started = time.monotonic()
+            try:
+                func = _resolve_entry(cfg["entry"])
+            except Exception as e:
+                logger.error(f"❌ 插件 '{name}' 加载失败 ({cfg['entry']}): {e}")
+                results[name] = (None, 0.0)
+                return
+            limiter = RateLimiter(cfg.get("rate_limit", 1), cfg.get("burst", 1))
+            ctx = PluginContext(name, client, limiter, cfg)
+            progress.tool_started(name)
+            subs, ok = await _run_source(ctx, func, targets, cfg.get("concurrency", 4))
+            progress.tool_finished(name)
+            results[name] = (subs if ok else None, time.monotonic() - started)
+
+        await asyncio.gather(*(timed(name, cfg) for name, cfg in selected.items()))
+    return results
+
+
+def run_plugins(selected: dict, targets: list) -> dict:
+    """
+    在同一个事件循环中并发运行选中的插件，返回 {名称: (子域名集合或 None, 耗时秒)}。
+    集合直接交给合并阶段，无需落盘再解析。
+    """
+    if not selected or not targets:
+        return {}
+    logger.info(f"🚀 正在运行 {len(selected)} 个插件枚举器: {', '.join(selected)}")
+    return asyncio.run(_run_all(selected, targets))
+
+
+def save_plugin_output(name: str, subs: set, input_identifier: str, output_dir: Path) -> Path:
+    """插件结果存档到日志目录（供续跑与审计），与外部工具输出同名规则"""
+    output_file = build_output_file(name, input_identifier, output_dir, ".txt")
+    with open(release(output_file), 'w', encoding='utf-8') as f:
+        for sub in sorted(subs):
+            f.write(sub + '\n')
+    return store_artifact(output_file)
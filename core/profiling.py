@@ -0,0 +1,124 @@
+# core/profiling.py
+import contextlib
+from pathlib import Path
+from .utils import logger
+
+TOP_N = 30
+# 折叠栈展开的深度上限与最小占比，防止深层递归 / 极小分支让文件膨胀
+_MAX_DEPTH = 64
+_MIN_FRACTION = 1e-4
+
+
+class _NullProfiler:
+    """未开启 --profile 时使用：stage() 直接返回共享的空上下文，不引入任何额外开销"""
+
+    _null = contextlib.nullcontext()
+
+    def stage(self, name: str):
+        return self._null
+
+
+def _label(func) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # 内建函数
+        return name.replace(";", ":")
+    return f"{name} ({Path(filename).name}:{lineno})".replace(";", ":")
+
+
+def _collapsed_stacks(stats: dict) -> dict:
+    """
+    由 cProfile 的调用图近似还原调用栈：沿调用边按累计耗时占比向下分摊自身耗时，
+    输出 FlameGraph / speedscope 可读的「栈;栈;函数 微秒」格式。
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    lines = {}
+
+    def walk(func, stack, fraction):
+        tt, ct = stats[func][2], stats[func][3]
+        stack = stack + [_label(func)]
+        self_us = int(tt * fraction * 1e6)
+        if self_us > 0:
+            key = ";".join(stack)
+            lines[key] = lines.get(key, 0) + self_us
+        if len(stack) >= _MAX_DEPTH:
+            return
+        for callee, edge_ct in callees.get(func, ()):
+            callee_ct = stats[callee][3]
+            if callee_ct <= 0 or _label(callee) in stack:
+                continue
+            child_fraction = edge_ct * fraction / callee_ct
+            if child_fraction >= _MIN_FRACTION:
+                walk(callee, stack, min(1.0, child_fraction))
+
+    roots = [func for func, entry in stats.items() if not entry[4]]
+    for root in roots:
+        walk(root, [], 1.0)
+    return lines
+
+
+class StageProfiler:
+    """按阶段采集 cProfile 与 tracemalloc，结果写入任务日志目录下的 profile/"""
+
+    def __init__(self, out_dir: Path, top_n: int = TOP_N):
+        self.out_dir = Path(out_dir)
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.top_n = top_n
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        import cProfile
+        import pstats
+        import tracemalloc
+
+        tracemalloc.start(25)
+        before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            try:
+                self._write(name, profile, pstats, before, after, current, peak)
+            except Exception as e:
+                logger.warning(f"⚠️  写入阶段 [{name}] 的性能分析结果失败: {e}")
+
+    def _write(self, name, profile, pstats, before, after, current, peak):
+        pstats_path = self.out_dir / f"{name}.pstats"
+        profile.dump_stats(str(pstats_path))
+        stats = pstats.Stats(profile)
+
+        with open(self.out_dir / f"{name}.collapsed", 'w', encoding='utf-8') as f:
+            for stack, micros in sorted(_collapsed_stacks(stats.stats).items()):
+                f.write(f"{stack} {micros}\n")
+
+        with open(self.out_dir / f"{name}.alloc.txt", 'w', encoding='utf-8') as f:
+            f.write(f"# 阶段 [{name}] 内存分配（tracemalloc）\n")
+            f.write(f"# 结束时仍占用: {current / 1024 / 1024:.1f} MiB，峰值: {peak / 1024 / 1024:.1f} MiB\n\n")
+            f.write(f"## 按代码行的净增长 Top {self.top_n}\n")
+            for diff in after.compare_to(before, 'lineno')[:self.top_n]:
+                f.write(f"{diff}\n")
+            f.write(f"\n## 按调用栈的净增长 Top {min(10, self.top_n)}\n")
+            for diff in after.compare_to(before, 'traceback')[:min(10, self.top_n)]:
+                f.write(f"\n{diff.size_diff / 1024:.1f} KiB, {diff.count_diff} blocks\n")
+                for line in diff.traceback.format(limit=8):
+                    f.write(f"{line}\n")
+
+        total = sum(entry[2] for entry in stats.stats.values())
+        logger.info(f"🔬 阶段 [{name}] Python 耗时 {total:.2f}s，内存峰值 {peak / 1024 / 1024:.1f} MiB → {pstats_path.name}")
+
+
+def make_profiler(enabled: bool, log_dir: Path):
+    """--profile 开启时返回 StageProfiler，否则返回空实现"""
+    if not enabled:
+        return _NullProfiler()
+    out_dir = Path(log_dir) / "profile"
+    logger.info(f"🔬 性能分析已开启，结果目录: {out_dir}")
+    return StageProfiler(out_dir)
@@ -0,0 +1,227 @@
+# core/progress.py
+import atexit
+import logging
+import shutil
+import sys
+import threading
+import time
+import unicodedata
+
+# 工具输出文件超过该秒数没有增长即标记为疑似停滞
+STALL_SECONDS = 120
+REFRESH_INTERVAL = 0.5
+
+_CLEAR = "\r\x1b[2K"
+
+
+def _fmt_duration(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
+
+
+def _char_width(ch: str) -> int:
+    """终端显示宽度：全角 / 宽字符（中文、emoji）占两列，组合字符与变体选择符不占列"""
+    if unicodedata.combining(ch) or '\ufe00' <= ch <= '\ufe0f' or ch == '\u200d':
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in "WF" else 1
+
+
+def _truncate(text: str, width: int) -> str:
+    """按显示宽度截断（超出时以 … 结尾），避免状态行折行后回车只能清掉最后一行"""
+    if sum(_char_width(ch) for ch in text) <= width:
+        return text
+    used, out = 0, []
+    for ch in text:
+        w = _char_width(ch)
+        if used + w > width - 1:
+            break
+        out.append(ch)
+        used += w
+    return "".join(out) + "…"
+
+
+class _ToolState:
+    __slots__ = ("started", "count", "last_growth", "path", "offset", "note", "done")
+
+    def __init__(self, path=None):
+        self.started = time.monotonic()
+        self.last_growth = self.started
+        self.count = 0
+        self.path = path
+        self.offset = 0
+        self.note = ""
+        self.done = False
+
+
+class _StatusAwareStream:
+    """包装日志输出流：写日志前擦掉状态行，写完再重绘，避免两者互相覆盖"""
+
+    def __init__(self, stream, view):
+        self._stream = stream
+        self._view = view
+
+    def write(self, text):
+        with self._view._lock:
+            self._stream.write(_CLEAR)
+            self._stream.write(text)
+            if text.endswith("\n"):
+                self._view._draw_locked()
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class ProgressView:
+    """
+    扫描过程中的单行实时状态：各工具耗时与已发现数量、合并规模、DNS 进度（速率 / ETA）。
+    与 print_banner 一致，stdout 不是终端时不启用，所有更新方法退化为空操作。
+    """
+
+    def __init__(self):
+        self.active = False
+        self._lock = threading.RLock()
+        self._tools = {}
+        self._merge = None
+        self._dns = None
+        self._stream = None
+        self._handlers = []
+        self._thread = None
+        self._stop = threading.Event()
+
+    # ---------- 生命周期 ----------
+    def start(self):
+        if self.active or not sys.stdout.isatty():
+            return
+        self._stream = sys.stdout
+        wrapper = _StatusAwareStream(self._stream, self)
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is self._stream:
+                handler.setStream(wrapper)
+                self._handlers.append(handler)
+        self.active = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="progress", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        if not self.active:
+            return
+        self.active = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        with self._lock:
+            self._stream.write(_CLEAR)
+            self._stream.flush()
+            for handler in self._handlers:
+                handler.setStream(self._stream)
+            self._handlers.clear()
+
+    def _run(self):
+        while not self._stop.wait(REFRESH_INTERVAL):
+            self._poll_files()
+            with self._lock:
+                self._draw_locked()
+
+    # ---------- 工具 ----------
+    def tool_started(self, name: str, path=None):
+        if self.active:
+            with self._lock:
+                self._tools[name] = _ToolState(path)
+
+    def tool_add(self, name: str, n: int = 1):
+        if self.active:
+            state = self._tools.get(name)
+            if state is not None:
+                state.count += n
+                state.last_growth = time.monotonic()
+
+    def tool_note(self, name: str, text: str):
+        if self.active:
+            state = self._tools.get(name)
+            if state is not None:
+                state.note = text.strip()[:60]
+                state.last_growth = time.monotonic()
+
+    def tool_finished(self, name: str):
+        if self.active:
+            with self._lock:
+                self._tools.pop(name, None)
+
+    # ---------- 合并 / DNS ----------
+    def merge_size(self, n: int):
+        if self.active:
+            self._merge = n
+
+    def dns_started(self, total: int, label: str = "DNS"):
+        """DNS 解析进度；HTTP 探测等同样按「已完成 / 命中」计数的阶段用 label 区分"""
+        if self.active:
+            self._dns = {"label": label, "total": total, "done": 0, "hits": 0, "started": time.monotonic()}
+
+    def dns_advance(self, done: int = 0, hits: int = 0):
+        """done: 已得出结果的名字（速率与 ETA 据此计算）；hits: 其中有 A/AAAA 的主机"""
+        dns = self._dns
+        if self.active and dns is not None:
+            dns["done"] += done
+            dns["hits"] += hits
+
+    def dns_finished(self):
+        self._dns = None
+
+    # ---------- 渲染 ----------
+    def _poll_files(self):
+        """统计运行中工具输出文件新增的行数（只读增量部分）"""
+        now = time.monotonic()
+        for state in list(self._tools.values()):
+            if state.path is None:
+                continue
+            try:
+                with open(state.path, 'rb') as f:
+                    f.seek(state.offset)
+                    chunk = f.read()
+            except OSError:
+                continue
+            if chunk:
+                state.offset += len(chunk)
+                state.count += chunk.count(b"\n")
+                state.last_growth = now
+
+    def _render(self) -> str:
+        now = time.monotonic()
+        parts = []
+        for name, state in list(self._tools.items()):
+            text = f"[{name}] {_fmt_duration(now - state.started)} · {state.count} 条"
+            idle = now - state.last_growth
+            if idle >= STALL_SECONDS:
+                text += f" ⚠️ 停滞 {_fmt_duration(idle)}"
+            elif state.note:
+                text += f" · {state.note}"
+            parts.append(text)
+        if self._merge is not None:
+            parts.append(f"合并 {self._merge}")
+        dns = self._dns
+        if dns is not None:
+            elapsed = max(1e-6, now - dns["started"])
+            rate = dns["done"] / elapsed
+            remaining = max(0, dns["total"] - dns["done"])
+            eta = _fmt_duration(remaining / rate) if rate > 0 else "--:--"
+            parts.append(f"{dns['label']} {dns['done']}/{dns['total']} · {rate:.0f}/s · 命中 {dns['hits']} · ETA {eta}")
+        return "⏳ " + " | ".join(parts) if parts else ""
+
+    def _draw_locked(self):
+        if not self.active:
+            return
+        line = self._render()
+        width = shutil.get_terminal_size((120, 20)).columns - 1
+        self._stream.write(_CLEAR + _truncate(line, max(1, width)))
+        self._stream.flush()
+
+
+# 全局实例（与 utils.logger 一样按模块共享）
+progress = ProgressView()
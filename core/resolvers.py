@@ -0,0 +1,377 @@
+# core/resolvers.py
+import asyncio
+import ipaddress
+import os
+import random
+import shlex
+import string
+import struct
+import time
+from pathlib import Path
+from .utils import logger
+
+# DNS 报文常量
+_HEADER = struct.Struct(">HHHHHH")
+_RR = struct.Struct(">HHIH")
+QTYPES = {"A": 1, "CNAME": 5, "AAAA": 28}
+RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN", 4: "NOTIMP", 5: "REFUSED"}
+
+# 应答固定、不随地域变化的金丝雀名字（任何健康解析器都应返回这些地址之一）
+DEFAULT_CANARIES = (
+    "one.one.one.one=1.1.1.1,1.0.0.1",
+    "dns.google=8.8.8.8,8.8.4.4",
+)
+# 不存在的随机子域名应返回 NXDOMAIN；返回地址即为劫持（运营商广告页等）
+DEFAULT_NX_DOMAINS = ("example.com",)
+
+_settings = {"output": None, "config": {}}
+
+
+# ---------- 报文编解码 ----------
+def build_query(name: str, qtype: str = "A", txid: int = 0) -> bytes:
+    packet = bytearray(_HEADER.pack(txid, 0x0100, 1, 0, 0, 0))  # RD=1
+    for label in name.rstrip('.').split('.'):
+        raw = label.encode('idna') if not label.isascii() else label.encode('ascii')
+        packet.append(len(raw))
+        packet += raw
+    packet += b"\x00" + struct.pack(">HH", QTYPES[qtype], 1)
+    return bytes(packet)
+
+
+def _read_name(data: bytes, offset: int) -> tuple:
+    """读取（可能带压缩指针的）域名，返回 (名字, 名字之后的偏移)"""
+    labels = []
+    end = None
+    for _ in range(128):  # 防止指针环
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            offset = ((length & 0x3F) << 8) | data[offset + 1]
+            continue
+        if length == 0:
+            return '.'.join(labels), (end if end is not None else offset + 1)
+        labels.append(data[offset + 1:offset + 1 + length].decode('ascii', errors='replace'))
+        offset += 1 + length
+    raise ValueError("域名压缩指针过深")
+
+
+def parse_response(data: bytes) -> tuple:
+    """返回 (事务 ID, RCODE 名称, 问题名, [(类型, 值), ...])；仅解析 A / AAAA / CNAME 应答"""
+    txid, flags, qdcount, ancount, _, _ = _HEADER.unpack_from(data)
+    rcode = RCODES.get(flags & 0x000F, str(flags & 0x000F))
+    offset = _HEADER.size
+    question = ""
+    for _ in range(qdcount):
+        question, offset = _read_name(data, offset)
+        offset += 4
+    answers = []
+    for _ in range(ancount):
+        _, offset = _read_name(data, offset)
+        rtype, _, _, rdlength = _RR.unpack_from(data, offset)
+        offset += _RR.size
+        rdata = data[offset:offset + rdlength]
+        if rtype == 1 and rdlength == 4:
+            answers.append(("A", str(ipaddress.IPv4Address(rdata))))
+        elif rtype == 28 and rdlength == 16:
+            answers.append(("AAAA", str(ipaddress.IPv6Address(rdata))))
+        elif rtype == 5:
+            answers.append(("CNAME", _read_name(data, offset)[0]))
+        offset += rdlength
+    return txid, rcode, question.lower(), answers
+
+
+# ---------- UDP 客户端 ----------
+class _ResolverProtocol(asyncio.DatagramProtocol):
+    """每个被测解析器一个 UDP 端点，按事务 ID 匹配应答"""
+
+    def __init__(self):
+        self.pending = {}
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            parsed = parse_response(data)
+        except (ValueError, IndexError, struct.error):
+            return
+        waiter = self.pending.pop(parsed[0], None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(parsed)
+
+    def error_received(self, exc):
+        for waiter in self.pending.values():
+            if not waiter.done():
+                waiter.set_exception(exc)
+        self.pending.clear()
+
+
+async def query(protocol: _ResolverProtocol, name: str, qtype: str = "A", timeout: float = 2.0):
+    """发送一次查询，返回 (RCODE, 应答列表)；超时抛出 asyncio.TimeoutError"""
+    loop = asyncio.get_running_loop()
+    txid = random.randrange(1 << 16)
+    while txid in protocol.pending:
+        txid = random.randrange(1 << 16)
+    waiter = loop.create_future()
+    protocol.pending[txid] = waiter
+    protocol.transport.sendto(build_query(name, qtype, txid))
+    try:
+        _, rcode, question, answers = await asyncio.wait_for(waiter, timeout)
+    finally:
+        protocol.pending.pop(txid, None)
+    if question != name.lower().rstrip('.'):
+        raise ValueError(f"应答问题不匹配: {question}")
+    return rcode, answers
+
+
+# ---------- 测速 ----------
+def parse_resolver(text: str) -> tuple:
+    """'1.1.1.1' / '127.0.0.1:5353' / '[2606:4700::1111]:53' -> (IP, 端口)"""
+    text = text.strip()
+    if text.startswith('['):
+        host, _, port = text[1:].partition(']')
+        port = port.lstrip(':') or "53"
+    elif text.count(':') == 1:
+        host, port = text.split(':')
+    else:
+        host, port = text, "53"
+    ipaddress.ip_address(host)
+    return host, int(port)
+
+
+def format_resolver(host: str, port: int) -> str:
+    if port == 53:
+        return host
+    return f"[{host}]:{port}" if ':' in host else f"{host}:{port}"
+
+
+def parse_canaries(items) -> list:
+    """'name=ip1,ip2' 列表或 {name: [ip, ...]} -> [(name, {ip, ...})]"""
+    if isinstance(items, dict):
+        items = [f"{name}={','.join(ips)}" for name, ips in items.items()]
+    canaries = []
+    for item in items or DEFAULT_CANARIES:
+        name, _, ips = str(item).partition('=')
+        expected = {ip.strip() for ip in ips.split(',') if ip.strip()}
+        if not name.strip() or not expected:
+            raise ValueError(f"无效的金丝雀配置（应为 name=ip1,ip2）: {item}")
+        canaries.append((name.strip().lower(), expected))
+    return canaries
+
+
+class ResolverStats:
+    __slots__ = ("resolver", "sent", "timeouts", "errors", "latencies", "poisoned", "hijacked")
+
+    def __init__(self, resolver: str):
+        self.resolver = resolver
+        self.sent = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.latencies = []
+        self.poisoned = 0
+        self.hijacked = 0
+
+    @property
+    def error_rate(self) -> float:
+        return (self.timeouts + self.errors) / self.sent if self.sent else 1.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return float("inf")
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def healthy(self, max_error_rate: float) -> bool:
+        return (not self.poisoned and not self.hijacked and bool(self.latencies)
+                and self.error_rate <= max_error_rate)
+
+
+def _random_label() -> str:
+    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=16))
+
+
+async def _bench_one(host: str, port: int, canaries: list, nx_domains: list, rounds: int, timeout: float,
+                     max_error_rate: float):
+    stats = ResolverStats(format_resolver(host, port))
+    loop = asyncio.get_running_loop()
+    try:
+        transport, protocol = await loop.create_datagram_endpoint(_ResolverProtocol, remote_addr=(host, port))
+    except OSError:
+        stats.sent = 1
+        stats.errors = 1
+        return stats
+    try:
+        probes = [(name, expected) for _ in range(rounds) for name, expected in canaries]
+        probes += [(f"{_random_label()}.{domain}", None) for domain in nx_domains]
+        # 同一解析器内顺序查询：测得的是解析器本身的延迟，而不是自己制造的排队；
+        # 失败数已注定超过 max_error_rate 时提前结束，死解析器不必把每个查询都等到超时
+        error_budget = max_error_rate * len(probes)
+        for name, expected in probes:
+            if stats.timeouts + stats.errors > error_budget:
+                break
+            stats.sent += 1
+            started = time.monotonic()
+            try:
+                rcode, answers = await query(protocol, name, "A", timeout)
+            except asyncio.TimeoutError:
+                stats.timeouts += 1
+                continue
+            except (OSError, ValueError):
+                stats.errors += 1
+                continue
+            addresses = {value for rtype, value in answers if rtype == "A"}
+            if expected is None:
+                # 随机名字：NXDOMAIN 正常；返回地址即 NXDOMAIN 劫持
+                if addresses:
+                    stats.hijacked += 1
+                elif rcode not in ("NXDOMAIN", "NOERROR"):
+                    stats.errors += 1
+                else:
+                    stats.latencies.append((time.monotonic() - started) * 1000)
+                continue
+            if rcode != "NOERROR":
+                stats.errors += 1
+                continue
+            stats.latencies.append((time.monotonic() - started) * 1000)
+            if addresses and not addresses & expected:
+                stats.poisoned += 1
+    finally:
+        transport.close()
+    return stats
+
+
+async def _bench_all(candidates: list, cfg: dict) -> list:
+    canaries = parse_canaries(cfg.get("canaries"))
+    nx_domains = list(cfg.get("nx_domains") or DEFAULT_NX_DOMAINS)
+    rounds = max(1, int(cfg.get("rounds", 3)))
+    timeout = float(cfg.get("timeout", 2))
+    max_error_rate = float(cfg.get("max_error_rate", 0.2))
+    semaphore = asyncio.Semaphore(max(1, int(cfg.get("concurrency", 200))))
+
+    async def limited(host, port):
+        async with semaphore:
+            return await _bench_one(host, port, canaries, nx_domains, rounds, timeout, max_error_rate)
+
+    return await asyncio.gather(*(limited(host, port) for host, port in candidates))
+
+
+def load_candidates(path: Path) -> list:
+    candidates = {}
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            try:
+                candidates.setdefault(parse_resolver(line), None)
+            except ValueError:
+                logger.debug(f"忽略无效解析器: {line}")
+    return list(candidates)
+
+
+def benchmark(candidates: list, cfg: dict) -> list:
+    """测速全部候选解析器，返回按健康度排序的 ResolverStats（健康的在前）"""
+    results = asyncio.run(_bench_all(candidates, cfg))
+    max_error_rate = float(cfg.get("max_error_rate", 0.2))
+    return sorted(results, key=lambda s: (not s.healthy(max_error_rate), s.error_rate,
+                                          s.percentile(0.5), s.percentile(0.9)))
+
+
+def write_ranked(results: list, cfg: dict, output: Path) -> int:
+    """
+    写入完整测速报告 <output>.report.tsv 与健康解析器（按排名截取 keep 个），返回写入的解析器数。
+    没有健康解析器时不动 output：保留上一次的可用列表，{resolvers} 仍可引用。
+    """
+    max_error_rate = float(cfg.get("max_error_rate", 0.2))
+    keep = int(cfg.get("keep", 50))
+    healthy = [s for s in results if s.healthy(max_error_rate)][:keep or None]
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    report_path = output.with_name(output.name + ".report.tsv")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write("resolver\thealthy\tp50_ms\tp90_ms\terror_rate\ttimeouts\terrors\tpoisoned\thijacked\n")
+        for s in results:
+            p50, p90 = s.percentile(0.5), s.percentile(0.9)
+            f.write(f"{s.resolver}\t{'yes' if s.healthy(max_error_rate) else 'no'}\t"
+                    f"{'' if p50 == float('inf') else f'{p50:.1f}'}\t{'' if p90 == float('inf') else f'{p90:.1f}'}\t"
+                    f"{s.error_rate:.3f}\t{s.timeouts}\t{s.errors}\t{s.poisoned}\t{s.hijacked}\n")
+
+    if not healthy:
+        return 0
+    tmp_path = output.with_name(output.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for s in healthy:
+            f.write(s.resolver + '\n')
+    os.replace(tmp_path, output)
+    return len(healthy)
+
+
+# ---------- 配置 / 命令模板 ----------
+def configure(config: dict):
+    """读取 config.yaml 的 resolvers 段，确定健康解析器文件位置（命令模板中的 {resolvers}）"""
+    cfg = config.get("resolvers") or {}
+    _settings["config"] = cfg
+    _settings["output"] = Path(cfg.get("output", "./resolvers.ranked.txt")).expanduser().resolve()
+
+
+def ranked_path() -> Path:
+    return _settings["output"] or Path("./resolvers.ranked.txt").resolve()
+
+
+def template_value() -> str:
+    """命令模板中 {resolvers} 的取值；文件不存在时抛出 ValueError 提示先测速"""
+    path = ranked_path()
+    if not path.is_file() or path.stat().st_size == 0:
+        raise ValueError(f"健康解析器文件不存在或为空: {path}（先运行 --bench-resolvers）")
+    return shlex.quote(str(path))
+
+
+def expand_template(command: str) -> str:
+    """替换命令中的 {resolvers}（不含该变量时原样返回）"""
+    if "{resolvers}" not in command:
+        return command
+    return command.replace("{resolvers}", template_value())
+
+
+def run_benchmark(candidates_file: str = None) -> int:
+    """--bench-resolvers / 扫描前自动测速的入口，返回退出码"""
+    cfg = _settings["config"]
+    path = Path(candidates_file or cfg.get("candidates", "./resolvers.txt")).expanduser()
+    if not path.is_file():
+        logger.error(f"❌ 候选解析器列表不存在: {path}（每行一个 IP 或 IP:端口）")
+        return 1
+    candidates = load_candidates(path)
+    if not candidates:
+        logger.error(f"❌ {path} 中没有有效的解析器")
+        return 1
+    try:
+        parse_canaries(cfg.get("canaries"))
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return 1
+
+    logger.info(f"📡 正在测速 {len(candidates)} 个解析器（金丝雀校验 + NXDOMAIN 劫持检测）...")
+    started = time.monotonic()
+    results = benchmark(candidates, cfg)
+    output = ranked_path()
+    kept = write_ranked(results, cfg, output)
+    poisoned = sum(1 for s in results if s.poisoned)
+    hijacked = sum(1 for s in results if s.hijacked)
+    logger.info(f"✅ 解析器测速完成（{time.monotonic() - started:.1f}s）: {kept}/{len(results)} 个可用，"
+                f"{poisoned} 个应答被污染，{hijacked} 个劫持 NXDOMAIN → {output}")
+    for s in results[:5]:
+        if s.healthy(float(cfg.get("max_error_rate", 0.2))):
+            logger.info(f"  • {s.resolver}: p50 {s.percentile(0.5):.1f}ms，错误率 {s.error_rate:.1%}")
+    if kept == 0:
+        logger.error("❌ 没有健康的解析器，未更新可用列表")
+        return 1
+    return 0
+
+
+def needs_refresh(max_age_seconds: float) -> bool:
+    path = ranked_path()
+    if not path.is_file() or path.stat().st_size == 0:
+        return True
+    return time.time() - path.stat().st_mtime > max_age_seconds
@@ -0,0 +1,129 @@
+# core/scope.py
+from pathlib import Path
+from .utils import logger
+from .parsing import extract_hostname, is_valid_domain
+
+MINIMIZED_TARGETS_NAME = "targets.min.txt"
+
+
+def normalize_apex(raw: str) -> str:
+    """将目标行（域名 / URL / *.通配）规范化为根域，非法时返回空串"""
+    s = extract_hostname(raw)
+    if s.startswith('*.'):
+        s = s[2:]
+    return s if is_valid_domain(s) else ""
+
+
+class SuffixIndex:
+    """
+    反转标签后缀索引：example.com 存为 com -> example 的嵌套字典路径。
+    查询只需按标签数逐层下钻，与索引中根域数量无关（O(标签数)）。
+    """
+
+    _APEX = None  # 终止标记键；标签本身不可能为 None
+
+    def __init__(self, apexes=()):
+        self._root = {}
+        self._size = 0
+        for apex in apexes:
+            self.add(apex)
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __contains__(self, name: str) -> bool:
+        return self.match(name) is not None
+
+    def add(self, apex: str) -> bool:
+        """加入根域（需已规范化），重复加入返回 False"""
+        node = self._root
+        for label in reversed(apex.split('.')):
+            node = node.setdefault(label, {})
+        if self._APEX in node:
+            return False
+        node[self._APEX] = apex
+        self._size += 1
+        return True
+
+    def match(self, name: str):
+        """返回覆盖 name 的最短（最外层）根域，不在范围内返回 None"""
+        node = self._root
+        for label in reversed(name.split('.')):
+            node = node.get(label)
+            if node is None:
+                return None
+            apex = node.get(self._APEX)
+            if apex is not None:
+                return apex
+        return None
+
+    def match_all(self, name: str) -> list:
+        """返回覆盖 name 的全部根域（由外到内）"""
+        found = []
+        node = self._root
+        for label in reversed(name.split('.')):
+            node = node.get(label)
+            if node is None:
+                break
+            apex = node.get(self._APEX)
+            if apex is not None:
+                found.append(apex)
+        return found
+
+
+def load_targets(target_file: Path) -> list:
+    """读取目标文件中规范化后的根域（去重，保持原顺序）"""
+    targets = {}
+    with open(target_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            apex = normalize_apex(line)
+            if apex:
+                targets.setdefault(apex, None)
+            else:
+                logger.debug(f"忽略无效目标: {line}")
+    return list(targets)
+
+
+def load_scope(target_file: Path) -> SuffixIndex:
+    """从目标文件（-t 临时文件或 -T 列表）构建范围索引"""
+    return SuffixIndex(load_targets(target_file))
+
+
+def minimize_targets(apexes: list) -> tuple:
+    """
+    去掉已被其他目标覆盖的子目标（同时有 example.com 与 dev.example.com 时只保留前者）。
+    返回 (保留的目标列表（保持原顺序）, {被折叠的目标: 覆盖它的上级目标})。
+    """
+    index = SuffixIndex()
+    # 标签少的先入索引，保证上级总是先于下级
+    for apex in sorted(apexes, key=lambda a: a.count('.')):
+        if index.match(apex) is None:
+            index.add(apex)
+    kept, covered = [], {}
+    for apex in apexes:
+        ancestor = index.match(apex)
+        if ancestor == apex:
+            kept.append(apex)
+        else:
+            covered[apex] = ancestor
+    return kept, covered
+
+
+def write_minimized_targets(targets: list, log_dir: Path) -> tuple:
+    """最小化目标集并写入日志目录，返回 (目标文件路径, 保留的目标列表)"""
+    kept, covered = minimize_targets(targets)
+    for child, ancestor in covered.items():
+        logger.debug(f"目标 {child} 已被 {ancestor} 覆盖，合并枚举")
+    path = Path(log_dir) / MINIMIZED_TARGETS_NAME
+    with open(path, 'w', encoding='utf-8') as f:
+        for apex in kept:
+            f.write(apex + '\n')
+    if covered:
+        logger.info(f"✂️  目标最小化: {len(targets)} → {len(kept)} 个（{len(covered)} 个已被上级根域覆盖）")
+    return path, kept
@@ -0,0 +1 @@
+# core/sources/__init__.py
@@ -0,0 +1,16 @@
+# core/sources/crtsh.py
+"""crt.sh 证书透明日志插件"""
+from ..http_client import HTTPError
+
+BASE_URL = "https://crt.sh"
+
+
+async def enumerate(domain: str, ctx):
+    base_url = ctx.options.get("base_url", BASE_URL).rstrip("/")
+    resp = await ctx.get(f"{base_url}/", params={"q": f"%.{domain}", "output": "json"})
+    if resp.status != 200:
+        raise HTTPError(f"crt.sh 返回状态码 {resp.status}")
+    for entry in resp.json():
+        # name_value 可能包含多行（证书 SAN 列表）
+        for name in str(entry.get("name_value", "")).split("\n"):
+            yield name
@@ -0,0 +1,18 @@
+# core/sources/wayback.py
+"""Wayback Machine CDX 历史 URL 插件"""
+from ..http_client import HTTPError
+
+BASE_URL = "https://web.archive.org"
+
+
+async def enumerate(domain: str, ctx):
+    base_url = ctx.options.get("base_url", BASE_URL).rstrip("/")
+    resp = await ctx.get(
+        f"{base_url}/cdx/search/cdx",
+        params={"url": f"*.{domain}/*", "output": "txt", "fl": "original", "collapse": "urlkey"}
+    )
+    if resp.status != 200:
+        raise HTTPError(f"web.archive.org 返回状态码 {resp.status}")
+    for line in resp.text().splitlines():
+        # 每行是一个历史 URL，主机名由调用方统一提取
+        yield line
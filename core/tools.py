@@ -4,11 +4,13 @@ import sys
 import subprocess
 import shlex
 import re
-import shutil
 from datetime import datetime
 from pathlib import Path
 from .utils import logger
 from .io import build_output_file
+from .artifacts import store_artifact, release, link_or_copy
+from .progress import progress
+from .resolvers import template_value as resolvers_template_value
 
 
 def run_tool(tool_name: str, tool_cfg: dict, target_file: Path, input_identifier: str, output_dir: Path, is_single_domain: bool = False):
@@ -32,20 +34,28 @@ def run_tool(tool_name: str, tool_cfg: dict, target_file: Path, input_identifier
             suffix = "." + suffix
         output_file = build_output_file(tool_name, input_identifier, output_dir, suffix)
         output_dir.mkdir(parents=True, exist_ok=True)
+        release(output_file)  # 同名旧输出可能是对象库的硬链接，工具原地写入会改坏它
 
         try:
+            # {resolvers} 仅在命令用到时取值：健康解析器文件缺失时跳过该工具，而不是让工具回退到默认解析器
+            extra = {"resolvers": resolvers_template_value()} if "{resolvers}" in tool_cfg["command"] else {}
             cmd_str = tool_cfg["command"].format(
                 tool_path=shlex.quote(str(tool_path)),
                 target_file=shlex.quote(str(target_file)),
-                output_file=shlex.quote(str(output_file))
+                output_file=shlex.quote(str(output_file)),
+                **extra
             )
         except KeyError as e:
             logger.error(f"❌ [{tool_name}] 命令模板缺少变量: {{{e}}}")
             return None
+        except ValueError as e:
+            logger.error(f"❌ [{tool_name}] {e}")
+            return None
 
         logger.info(f"🚀 正在运行 [{tool_name}] ...")
         logger.debug(f"执行命令: {cmd_str}")
 
+        progress.tool_started(tool_name, output_file)
         try:
             result = subprocess.run(
                 cmd_str,
@@ -54,8 +64,10 @@ def run_tool(tool_name: str, tool_cfg: dict, target_file: Path, input_identifier
                 encoding='utf-8',
                 errors='replace'
             )
+            progress.tool_finished(tool_name)
 
             if result.returncode == 0:
+                output_file = store_artifact(output_file)
                 logger.info(f"✅ [{tool_name}] 成功 → {output_file.name}")
                 return output_file
             else:
@@ -63,6 +75,7 @@ def run_tool(tool_name: str, tool_cfg: dict, target_file: Path, input_identifier
                 return None
 
         except Exception as e:
+            progress.tool_finished(tool_name)
             logger.error(f"❌ 执行 [{tool_name}] 异常: {e}")
             return None
 
@@ -99,11 +112,13 @@ def run_tool(tool_name: str, tool_cfg: dict, target_file: Path, input_identifier
 
         # === 关键：边读边匹配，不缓存全部 stdout ===
         extracted_filename = None
+        progress.tool_started("oneforall")
 
         for line in proc.stdout:
-            print(line, end='', flush=True)  # 实时透传给用户
-            
             clean_line = ansi_escape.sub('', line)
+            # 不再逐行透传：终端上显示在状态行里，完整输出仅在 DEBUG 级别记录
+            progress.tool_note("oneforall", clean_line)
+            logger.debug(f"[OneForAll] {clean_line.rstrip()}")
 
             if is_single_domain:
                 match = re.search(r"The subdomain result for [^:]+:\s*(\S+\.csv)", clean_line)
@@ -124,6 +139,7 @@ def run_tool(tool_name: str, tool_cfg: dict, target_file: Path, input_identifier
                             extracted_filename = candidate_name
 
         proc.wait()
+        progress.tool_finished("oneforall")
 
         if proc.returncode != 0:
             logger.warning(f"⚠️  [OneForAll] 失败 (退出码: {proc.returncode})")
@@ -141,14 +157,16 @@ def run_tool(tool_name: str, tool_cfg: dict, target_file: Path, input_identifier
                     time_part = datetime.now().strftime("%y%m%d_%H%M")
                 new_name = f"{safe_input}_oneforall_{time_part}{real_output_path.suffix}"
                 copied_path = output_dir / new_name
-                shutil.copy2(real_output_path, copied_path)
-                logger.info(f"\n✅ [OneForAll] 成功 → {copied_path.name}")
+                link_or_copy(real_output_path, copied_path)
+                copied_path = store_artifact(copied_path)
+                logger.info(f"✅ [OneForAll] 成功 → {copied_path.name}")
                 return copied_path
 
         logger.error("❌ 未能从 OneForAll 输出中提取有效结果文件路径")
         return None
 
     except Exception as e:
+        progress.tool_finished("oneforall")
         logger.error(f"❌ 执行 [OneForAll] 异常: {e}")
         return None
 
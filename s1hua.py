@@ -9,12 +9,26 @@
 import sys
 import argparse
 import os
+import time
 from pathlib import Path
 from core.utils import print_banner, setup_logging, setup_temp_dir, logger
 from core.config import generate_default_config, load_config
 from core.io import validate_target, create_temp_file_from_domain
 from core.tools import select_tools_interactive, run_tool
-from core.merging import merge_and_dedup
+from core.merging import merge_and_dedup, write_target_attribution
+from core.parsers import parser_for
+from core.scope import load_scope, load_targets, write_minimized_targets
+from core.plugins import load_plugins, run_plugins, save_plugin_output
+from core.progress import progress
+from core.checkpoint import RunManifest
+from core.artifacts import configure as configure_artifacts, open_text
+from core.inventory import Inventory, inventory_path, run_query, QUERY_KINDS
+from core.planner import history_path, parse_budget, load_stats, plan_tools, record_runs
+from core.profiling import make_profiler
+from core.permutation import Permuter, STATE_NAME as PERMUTATION_STATE
+from core.http_probe import HttpProber
+from core.networks import NetworkAggregator
+from core.resolvers import configure as configure_resolvers, run_benchmark, needs_refresh
 
 
 # ============ 新增：辅助函数 ============
@@ -41,7 +55,12 @@ def main():
         epilog="示例:\n"
                "  python3 %(prog)s --init\n"
                "  python3 %(prog)s -t baidu.com\n"
-               "  python3 %(prog)s -T targets.txt"
+               "  python3 %(prog)s -T targets.txt\n"
+               "  python3 %(prog)s -T targets.txt --budget 30m\n"
+               "  python3 %(prog)s --resume logs/targets_250101_1200\n"
+               "  python3 %(prog)s --query growth 7d\n"
+               "  python3 %(prog)s --bench-resolvers resolvers.txt\n"
+               "  python3 %(prog)s -T targets.txt --profile"
     )
 
     parser.add_argument('--init', action='store_true', help='初始化或重置 config.yaml 并退出')
@@ -49,6 +68,22 @@ def main():
     target_group = parser.add_mutually_exclusive_group(required=False)
     target_group.add_argument('-t', '--target', metavar='<domain>', type=str, help='单个域名')
     target_group.add_argument('-T', '--target-list', metavar='<file>', type=str, help='域名列表文件')
+    target_group.add_argument('--resume', metavar='<task_dir>', type=str,
+                              help='从中断任务的日志目录续跑（跳过已完成的工具与阶段）')
+    target_group.add_argument('--query', metavar='<kind>', nargs='+',
+                              help=f'查询资产库并退出，kind: {" / ".join(QUERY_KINDS)}'
+                                   '（如: growth 7d、new 24h example.com、ip 1.2.3.4）')
+    target_group.add_argument('--bench-resolvers', metavar='<file>', nargs='?', const='',
+                              help='测速候选解析器列表并写入健康度排序后的解析器文件（命令模板中的 {resolvers}）后退出，'
+                                   '不指定文件时使用 config.yaml 的 resolvers.candidates')
+    parser.add_argument('--budget', metavar='<time>', type=str,
+                        help='非交互模式：按历史收益/耗时在时间预算内自动选择工具（如 900、30m、2h）')
+    parser.add_argument('--permute', action='store_true',
+                        help='DNS 清洗后对合并结果做排列组合并解析（参数见 config.yaml 的 permutation 段）')
+    parser.add_argument('--probe', action='store_true',
+                        help='DNS 清洗后探测可达主机的 HTTP(S) 服务（参数见 config.yaml 的 http_probe 段）')
+    parser.add_argument('--profile', action='store_true',
+                        help='性能分析：各阶段的 cProfile / 内存分配报告 / 火焰图折叠栈写入日志目录 profile/')
 
     args = parser.parse_args()
 
@@ -58,16 +93,64 @@ def main():
         else:
             sys.exit(1)
 
+    if args.query:
+        config = load_config()
+        setup_logging(config.get("log_level", "INFO"))
+        sys.exit(run_query(config, args.query))
+
+    if args.bench_resolvers is not None:
+        config = load_config()
+        setup_logging(config.get("log_level", "INFO"))
+        configure_resolvers(config)
+        sys.exit(run_benchmark(args.bench_resolvers or None))
+
     print_banner()
 
-    if not args.target and not args.target_list:
-        parser.error("必须指定 -t/--target 或 -T/--target-list（除非使用 --init）")
+    if not args.target and not args.target_list and not args.resume:
+        parser.error("必须指定 -t/--target、-T/--target-list 或 --resume（除非使用 --init）")
+
+    budget = None
+    if args.budget:
+        try:
+            budget = parse_budget(args.budget)
+        except ValueError as e:
+            parser.error(str(e))
 
     config = load_config()
     setup_logging(config.get("log_level", "INFO"))
     setup_temp_dir()
+    configure_artifacts(config)
+    configure_resolvers(config)
 
-    if args.target:
+    # 扫描前测速：健康解析器文件缺失或超过 max_age 时重新生成
+    resolvers_cfg = config.get("resolvers") or {}
+    if resolvers_cfg.get("auto_bench", False):
+        try:
+            max_age = parse_budget(resolvers_cfg.get("max_age", "24h"))
+        except ValueError as e:
+            logger.error(f"❌ resolvers.max_age 配置错误: {e}")
+            sys.exit(1)
+        if needs_refresh(max_age):
+            logger.info("📡 健康解析器文件缺失或已过期，扫描前重新测速")
+            if run_benchmark() != 0:
+                logger.warning("⚠️  解析器测速失败，沿用现有解析器文件（如有）")
+
+    manifest = None
+    if args.resume:
+        try:
+            manifest = RunManifest.load(args.resume)
+        except Exception as e:
+            logger.error(f"❌ 无法加载任务清单: {e}")
+            sys.exit(1)
+        input_identifier = manifest.input_identifier
+        target_file = manifest.target_file
+        is_single_domain = manifest.is_single_domain
+        next_stage = manifest.first_unfinished_stage()
+        if next_stage is None:
+            logger.info(f"✅ 任务 '{input_identifier}' 所有阶段均已完成，无需续跑: {manifest.result_dir}")
+            sys.exit(0)
+        logger.info(f"♻️  续跑任务 '{input_identifier}'，从阶段 [{next_stage}] 继续")
+    elif args.target:
         logger.info(f"📥 单域名模式: {args.target}")
         target_file = create_temp_file_from_domain(args.target)
         input_identifier = args.target
@@ -79,38 +162,137 @@ def main():
             input_identifier = Path(args.target_list).stem
             domain_count = count_domains_in_file(target_file)
             is_single_domain = (domain_count == 1)
-            if is_single_domain:
-                logger.info("🔍 检测到目标文件仅包含一个域名，启用 OneForAll 单域名模式")
-            else:
-                logger.info(f"🔍 检测到目标文件包含 {domain_count} 个域名，启用 OneForAll 多域名模式")
         except Exception:
             sys.exit(1)
 
-    from core.io import get_task_dirs
-    log_task_dir, result_task_dir = get_task_dirs(input_identifier, config)
+    scope = None
+    if (config.get("scope") or {}).get("enabled", True):
+        scope = load_scope(target_file)
+        if scope:
+            logger.info(f"🎯 范围过滤已启用: {len(scope)} 个目标根域")
+        else:
+            logger.warning("⚠️  目标中无有效根域，范围过滤已关闭")
+            scope = None
+
+    if manifest is not None:
+        log_task_dir, result_task_dir = manifest.log_dir, manifest.result_dir
+    else:
+        from core.io import get_task_dirs
+        log_task_dir, result_task_dir = get_task_dirs(input_identifier, config)
     logger.info(f"📁 日志目录: {log_task_dir}")
     logger.info(f"📁 结果目录: {result_task_dir}")
+    profiler = make_profiler(args.profile, log_task_dir)
+
+    # 目标最小化：规范化去重，并折叠已被上级根域覆盖的目标，工具只枚举一次上级
+    original_targets = load_targets(target_file)
+    targets = original_targets
+    tool_target_file = target_file
+    if not is_single_domain and original_targets and (config.get("scope") or {}).get("minimize_targets", True):
+        tool_target_file, targets = write_minimized_targets(original_targets, log_task_dir)
+        # 大小写 / URL 形式不同的同一域名最小化后只剩一个：工具实际拿到的是单个目标（续跑沿用清单中的模式）
+        if manifest is None and len(targets) == 1:
+            is_single_domain = True
+    if args.target_list:
+        if is_single_domain:
+            logger.info("🔍 目标文件仅包含一个域名，启用 OneForAll 单域名模式")
+        else:
+            logger.info(f"🔍 目标文件包含 {len(targets) or domain_count} 个域名，启用 OneForAll 多域名模式")
 
     tools_config = config.get("subdomain_enumerators", {})
     if not isinstance(tools_config, dict) or not tools_config:
         logger.error("❌ 配置文件中 'subdomain_enumerators' 字段为空或格式错误，请检查 config.yaml")
         sys.exit(1)
 
-    tools_order = list(tools_config.keys())
-    logger.info(f"⚙️  配置中定义了 {len(tools_order)} 个工具")
-
-    selected_tools = select_tools_interactive(tools_order, tools_config)
+    plugins_config = load_plugins(config, reserved_names=tools_config)
+    sources_config = {**tools_config, **plugins_config}
+    tools_order = list(sources_config.keys())
+    logger.info(f"⚙️  配置中定义了 {len(tools_config)} 个工具、{len(plugins_config)} 个插件")
+
+    n_targets = 1 if is_single_domain else (len(targets) or count_domains_in_file(target_file))
+    target_type = "single" if is_single_domain else "multi"
+
+    if manifest is not None:
+        selected_tools = [name for name in manifest.selected_tools if name in sources_config]
+    elif budget is not None or not sys.stdin.isatty():
+        # 无人值守：按历史统计自动规划（无 TTY 且未给预算时不限时）
+        logger.info("🧮 自动规划工具" + (f"（时间预算 {budget:.0f}s）" if budget is not None else "（非交互终端，不限时）"))
+        stats = load_stats(history_path(config), target_type)
+        selected_tools = plan_tools(tools_order, stats, n_targets, budget)
+    else:
+        selected_tools = select_tools_interactive(tools_order, sources_config)
     if not selected_tools:
         logger.info("⚠️  未选择任何工具，退出。")
         sys.exit(0)
     logger.info(f"🎯 将运行 {len(selected_tools)} 个工具: {', '.join(selected_tools)}")
 
+    if manifest is None:
+        manifest = RunManifest.create(
+            log_task_dir, result_task_dir, input_identifier,
+            target_file, is_single_domain, selected_tools
+        )
+    logger.info(f"💾 任务清单: {manifest.path}（中断后可用 --resume {log_task_dir} 续跑）")
+
+    inventory, inventory_run = None, None
+    inv_path = inventory_path(config)
+    if inv_path is not None:
+        try:
+            inventory = Inventory(inv_path)
+            inventory_run = manifest.data.get("inventory_run")
+            if inventory_run is None:
+                inventory_run = inventory.start_run(input_identifier, log_task_dir, result_task_dir)
+                manifest.data["inventory_run"] = inventory_run
+                manifest.save()
+            logger.info(f"🗄️  资产库: {inv_path}（run #{inventory_run}）")
+        except Exception as e:
+            logger.warning(f"⚠️  无法打开资产库，本次不写入: {e}")
+            inventory = None
+
+    progress.start()
+
     tool_output_map = {}
+    tool_runs = {}  # 本次实际运行的工具: (耗时, 是否成功)，写入历史供规划器学习
+    # 本次有工具重新运行时，后续阶段的旧产物不再可信，需要重做
+    rerun_downstream = False
+
+    # ======== 插件枚举器：同一事件循环内并发运行，结果集合直接交给合并阶段 ========
+    plugin_results = {}
+    pending_plugins = {}
+    for name in selected_tools:
+        if name not in plugins_config:
+            continue
+        previous_output = manifest.tool_output(name)
+        if previous_output is not None:
+            logger.info(f"⏭️  [{name}] 已完成，复用输出 → {previous_output.name}")
+            tool_output_map[name] = previous_output
+        else:
+            pending_plugins[name] = plugins_config[name]
+    with profiler.stage("plugins"):
+        plugin_runs = run_plugins(pending_plugins, targets)
+    for name, (subs, elapsed) in plugin_runs.items():
+        output_path = None
+        if subs is not None:
+            output_path = save_plugin_output(name, subs, input_identifier, log_task_dir)
+            plugin_results[name] = subs
+            tool_output_map[name] = output_path
+            rerun_downstream = True
+            logger.info(f"✅ [{name}] 成功 → {len(subs)} 个子域名（{elapsed:.1f}s）")
+        else:
+            logger.warning(f"⚠️  [{name}] 失败")
+        manifest.mark_tool(name, output_path, elapsed)
+        tool_runs[name] = (elapsed, subs is not None)
 
     # ======== 获取当前 Python 可执行文件路径（用于替换 python3） ========
     current_python = sys.executable  # 完整路径，如 C:\Python\python.exe 或 /usr/bin/python3
 
     for tool_name in selected_tools:
+        if tool_name in plugins_config:
+            continue
+        previous_output = manifest.tool_output(tool_name)
+        if previous_output is not None:
+            logger.info(f"⏭️  [{tool_name}] 已完成，复用输出 → {previous_output.name}")
+            tool_output_map[tool_name] = previous_output
+            continue
+
         tool_cfg = tools_config[tool_name]
 
         if not isinstance(tool_cfg, dict):
@@ -136,16 +318,24 @@ def main():
         tool_cfg_fixed = tool_cfg.copy()
         tool_cfg_fixed["command"] = fixed_command
 
-        output_path = run_tool(
-            tool_name=tool_name,
-            tool_cfg=tool_cfg_fixed,  # ← 使用修正后的配置
-            target_file=target_file,
-            input_identifier=input_identifier,
-            output_dir=log_task_dir,
-            is_single_domain=is_single_domain
-        )
+        started = time.monotonic()
+        with profiler.stage(f"tool-{tool_name}"):
+            output_path = run_tool(
+                tool_name=tool_name,
+                tool_cfg=tool_cfg_fixed,  # ← 使用修正后的配置
+                target_file=tool_target_file,
+                input_identifier=input_identifier,
+                output_dir=log_task_dir,
+                is_single_domain=is_single_domain
+            )
+        elapsed = time.monotonic() - started
+        manifest.mark_tool(tool_name, output_path, elapsed)
+        tool_runs[tool_name] = (elapsed, output_path is not None)
         if output_path is not None:
             tool_output_map[tool_name] = output_path
+            rerun_downstream = True
+
+    manifest.mark_stage("enumeration", **{f"tool:{name}": path for name, path in tool_output_map.items()})
 
     success_count = len(tool_output_map)
     total_requested = len(selected_tools)
@@ -166,21 +356,43 @@ def main():
                     count = "文件不存在（但曾报告成功）"
                 else:
                     try:
-                        with open(output_file, 'r', encoding='utf-8', errors='ignore') as f:
+                        with open_text(output_file) as f:
                             count = sum(1 for line in f if line.strip())
                     except Exception as e:
                         count = f"读取异常: {type(e).__name__}"
                 logger.info(f"  • [{tool_name}] → {count}")
 
-        merged_path = merge_and_dedup(
-            selected_tools, 
-            tool_output_map, 
-            input_identifier, 
-            log_task_dir, 
-            result_task_dir
-        )
-
-        if merged_path and merged_path.exists():
+        if not rerun_downstream and manifest.stage_done("merge"):
+            merged_path = manifest.stage_artifact("merge", "merged")
+            logger.info(f"⏭️  合并阶段已完成，复用 → {merged_path.name}")
+        else:
+            rerun_downstream = True
+            contributions = {}
+            with profiler.stage("merge"):
+                merged_path = merge_and_dedup(
+                    selected_tools, 
+                    tool_output_map, 
+                    input_identifier, 
+                    log_task_dir, 
+                    result_task_dir,
+                    scope=scope,
+                    contributions=contributions,
+                    direct_results=plugin_results,
+                    parsers={name: parser_for(name, tools_config.get(name)) for name in tool_output_map}
+                )
+            record_runs(history_path(config), target_type, n_targets, tool_runs, contributions)
+            if merged_path is not None:
+                manifest.mark_stage("merge", merged=merged_path)
+                if len(original_targets) > 1:
+                    write_target_attribution(merged_path, original_targets, result_task_dir, input_identifier)
+                if inventory is not None:
+                    with open_text(merged_path) as f:
+                        added = inventory.add_subdomains(inventory_run, (line.strip() for line in f if line.strip()), scope)
+                    logger.info(f"🗄️  资产库已登记 {added} 个子域名")
+
+        if merged_path and merged_path.exists() and not rerun_downstream and manifest.stage_done("dns"):
+            logger.info("⏭️  DNS 清洗阶段已完成，跳过")
+        elif merged_path and merged_path.exists():
             try:
                 from core.dns_resolver import run_dns_resolution_and_export
                 dns_config = config.get("dns_resolution", {})
@@ -188,9 +400,41 @@ def main():
                     logger.error("❌ config.yaml 中缺少 'dns_resolution.command'，请检查配置！")
                     sys.exit(1)
 
-                excel_path, reachable_path = run_dns_resolution_and_export(
-                    merged_path, result_task_dir, input_identifier, dns_config
-                )
+                record_sink = None
+                if inventory is not None:
+                    record_sink = lambda rows: inventory.add_records(inventory_run, rows)
+
+                permuter = None
+                perm_cfg = config.get("permutation") or {}
+                if args.permute or perm_cfg.get("enabled", False):
+                    state_path = None
+                    if perm_cfg.get("persist", True):
+                        logs_root = Path((config.get("output") or {}).get("logs_dir", "./logs")).resolve()
+                        state_path = logs_root / PERMUTATION_STATE
+                    permuter = Permuter(perm_cfg, scope=scope, state_path=state_path)
+
+                aggregator = None
+                networks_cfg = config.get("networks") or {}
+                if networks_cfg.get("enabled", False):
+                    aggregator = NetworkAggregator(networks_cfg)
+
+                prober = None
+                probe_cfg = config.get("http_probe") or {}
+                if args.probe or probe_cfg.get("enabled", False):
+                    prober = HttpProber(probe_cfg)
+                with profiler.stage("dns"):
+                    excel_path, reachable_path = run_dns_resolution_and_export(
+                        merged_path, result_task_dir, input_identifier, dns_config,
+                        record_sink=record_sink, permuter=permuter, prober=prober,
+                        aggregator=aggregator
+                    )
+                if permuter is not None and permuter.discovered and inventory is not None:
+                    added = inventory.add_subdomains(inventory_run, permuter.discovered, scope)
+                    logger.info(f"🗄️  资产库已登记 {added} 个排列组合新发现")
+                if prober is not None and prober.results and inventory is not None:
+                    added = inventory.add_http(inventory_run, prober.results)
+                    logger.info(f"🗄️  资产库已登记 {added} 个 HTTP 服务")
+                manifest.mark_stage("dns", excel=excel_path, reachable=reachable_path)
                 logger.info(f"📊 DNS 报告已生成: {excel_path.name}")
                 logger.info(f"🎯 可探测目标清单: {reachable_path.name}")
             except Exception as e:
@@ -199,8 +443,13 @@ def main():
         else:
             logger.warning("⚠️ 合并文件不存在，跳过 DNS 清洗。")
     else:
+        record_runs(history_path(config), target_type, n_targets, tool_runs, {})
         logger.warning("⚠️ 无成功工具，跳过合并与 DNS 清洗步骤。")
 
+    if inventory is not None:
+        inventory.close()
+    progress.stop()
+    manifest.mark_completed()
     logger.info(f"✅ 任务完成！高价值结果位于: {result_task_dir}")
 
 
@@ -0,0 +1,47 @@
+# tests/test_artifacts.py
+import gzip
+import hashlib
+import shutil
+
+from core import artifacts
+from core.artifacts import store_artifact, release
+
+
+def _configure(tmp_path):
+    config = {"artifacts": {"compression": "gzip"}, "output": {"logs_dir": str(tmp_path)}}
+    artifacts.configure(config)
+    return config
+
+
+def _objects(tmp_path):
+    return sorted(p.name for p in (tmp_path / ".store").rglob("*.gz"))
+
+
+def test_rewrite_does_not_change_deduplicated_copy(tmp_path):
+    _configure(tmp_path)
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    a.write_text("x\n")
+    b.write_text("x\n")
+    stored_a, _ = store_artifact(a), store_artifact(b)
+    release(b).write_text("different\n")
+    store_artifact(b)
+    assert gzip.open(stored_a).read() == b"x\n"
+    for obj in (tmp_path / ".store").rglob("*.gz"):
+        assert obj.name.startswith(hashlib.sha256(obj.read_bytes()).hexdigest())
+
+
+def test_unreferenced_store_objects_are_pruned(tmp_path):
+    config = _configure(tmp_path)
+    for task, name, content in (("t1", "a.txt", "same\n"), ("t2", "a.txt", "same\n"), ("t1", "b.txt", "only\n")):
+        (tmp_path / task).mkdir(exist_ok=True)
+        path = tmp_path / task / name
+        path.write_text(content)
+        store_artifact(path)
+    assert len(_objects(tmp_path)) == 2
+
+    shutil.rmtree(tmp_path / "t1")
+    artifacts.configure(config)
+    assert len(_objects(tmp_path)) == 1
+    shutil.rmtree(tmp_path / "t2")
+    artifacts.configure(config)
+    assert _objects(tmp_path) == []
@@ -0,0 +1,68 @@
+# tests/test_http_probe.py
+import http.server
+import time
+
+from core.dns_records import RecordStore
+from core.http_probe import HttpProber, probe_hosts, parse_ports
+
+
+class _Site(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/":
+            self._send(302, b"", location="/login")
+        elif self.path == "/login":
+            self._send(200, "<html><title> 登录 &amp; 欢迎 </title></html>".encode("utf-8"))
+        elif self.path == "/slow":
+            time.sleep(1.5)
+            self._send(200, b"<title>late</title>")
+
+    def _send(self, status, body, location=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if location:
+            self.send_header("Location", location)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _SlowRedirect(_Site):
+    def do_GET(self):
+        if self.path == "/":
+            self._send(302, b"", location="/slow")
+        else:
+            super().do_GET()
+
+
+def test_parse_ports():
+    assert parse_ports([80, 443, "https:8000"]) == [("http", 80), ("https", 443), ("https", 8000)]
+
+
+def test_probe_follows_same_origin_redirect(http_server):
+    port = http_server(_Site)
+    results = probe_hosts({"localhost": "127.0.0.1"}, {"ports": [f"http:{port}"], "timeout": 2})
+    assert len(results) == 1
+    r = results[0]
+    assert (r.status, r.title, r.redirect) == (302, "登录 & 欢迎", f"http://localhost:{port}/login")
+
+
+def test_failed_redirect_hop_keeps_result(http_server):
+    port = http_server(_SlowRedirect)
+    results = probe_hosts({"localhost": "127.0.0.1"}, {"ports": [f"http:{port}"], "timeout": 0.5})
+    assert [(r.status, r.title) for r in results] == [(302, "")]
+
+
+def test_prober_writes_report(tmp_path, http_server):
+    port = http_server(_Site)
+    store = RecordStore()
+    store.add("localhost", "A", "127.0.0.1")
+    store.add("closed.localhost", "A", "127.0.0.2")
+    title, headers, _, rows = HttpProber({"ports": [f"http:{port}"], "timeout": 1}).run(store, tmp_path, "t")
+    assert title == "HTTP" and headers[0] == "URL"
+    assert [row[0] for row in rows] == [f"http://localhost:{port}/"]
+    assert (tmp_path / "t_http.txt").read_text().startswith(f"http://localhost:{port}/ [302]")
@@ -0,0 +1,39 @@
+# tests/test_networks.py
+from core.dns_records import RecordStore
+from core.networks import NetworkAggregator
+
+
+def _sheets(tmp_path):
+    cdn_list = tmp_path / "cdn.txt"
+    cdn_list.write_text("104.16.0.0/13\n", encoding="utf-8")
+    asn_db = tmp_path / "ip2asn-v4.tsv"
+    asn_db.write_text("104.16.0.0\t104.23.255.255\t13335\tUS\tCLOUDFLARENET\n"
+                      "198.51.100.0\t198.51.100.127\t64500\tUS\tEXAMPLE-A\n"
+                      "198.51.100.128\t198.51.100.255\t64501\tUS\tEXAMPLE-B\n", encoding="utf-8")
+    store = RecordStore()
+    store.add("b.example.com", "A", "198.51.100.200")
+    store.add("a.example.com", "A", "198.51.100.10")
+    store.add("a.example.com", "A", "198.51.100.11")
+    store.add("cdn.example.com", "A", "104.16.1.1")
+    aggregator = NetworkAggregator({"cidr_lists": [{"name": "Cloudflare", "path": str(cdn_list), "cdn": True}],
+                                    "asn_db": str(asn_db)})
+    return {name: (headers, list(rows)) for name, headers, _, rows in aggregator.run(store, tmp_path, "t")}
+
+
+def test_fallback_network_has_no_provider_label(tmp_path):
+    headers, rows = _sheets(tmp_path)["By IP"]
+    by_ip = {row[0]: dict(zip(headers, row)) for row in rows}
+    assert by_ip["198.51.100.10"]["Provider"] == ""
+    assert by_ip["198.51.100.10"]["ASN"] == "AS64500 EXAMPLE-A"
+    assert by_ip["104.16.1.1"]["Provider"] == "Cloudflare"
+
+
+def test_network_asn_covers_every_ip(tmp_path):
+    headers, rows = _sheets(tmp_path)["By Network"]
+    by_net = {row[0]: dict(zip(headers, row)) for row in rows}
+    fallback = by_net["198.51.100.0/24"]
+    assert fallback["Provider"] == ""
+    assert fallback["ASN"] == "AS64500 EXAMPLE-A, AS64501 EXAMPLE-B"
+    assert fallback["IPs"] == 3 and fallback["Hosts"] == 2
+    assert by_net["104.16.0.0/13"]["Provider"] == "Cloudflare"
+    assert by_net["104.16.0.0/13"]["ASN"] == "AS13335 CLOUDFLARENET"
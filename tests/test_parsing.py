@@ -0,0 +1,66 @@
+# tests/test_parsing.py
+import gzip
+
+import pytest
+
+from core import parsing
+from core.artifacts import zstandard
+from core.parsing import first_token_names, extract_hostname, is_valid_domain
+
+LINES = [
+    "www.example.com [A] 1.2.3.4",
+    "https://API.Example.com:8443/login ok",
+    "  mail.example.com.",
+    "",
+    "1.2.3.4",
+    "-bad-.example.com",
+    "x" * 300 + ".example.com",
+    "dev.example.com\r",
+    "bücher.example.com",
+    "last.example.com",
+]
+
+
+def _reference(lines) -> set:
+    subs = set()
+    for line in lines:
+        parts = line.split(None, 1)
+        if parts:
+            candidate = extract_hostname(parts[0])
+            if is_valid_domain(candidate):
+                subs.add(candidate)
+    return subs
+
+
+@pytest.fixture
+def spy_blocks(monkeypatch):
+    """小块尺寸迫使切块 / 余行拼接；记录经过字节扫描的块数"""
+    calls = []
+    real = parsing._scan_block
+    monkeypatch.setattr(parsing, "_SCAN_BLOCK_SIZE", 64)
+    monkeypatch.setattr(parsing, "_scan_block", lambda block, subs: (calls.append(block), real(block, subs)))
+    return calls
+
+
+def test_gzip_output_uses_block_scanner(tmp_path, spy_blocks):
+    lines = LINES * 50
+    path = tmp_path / "tool.txt.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines))  # 末行无换行
+    assert first_token_names(path) == _reference(lines)
+    assert len(spy_blocks) > 1
+    assert all(block.endswith(b"\n") for block in spy_blocks[:-1])
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard 未安装")
+def test_zstd_output_uses_block_scanner(tmp_path, spy_blocks):
+    path = tmp_path / "tool.txt.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress("\n".join(LINES).encode("utf-8") + b"\n"))
+    assert first_token_names(path) == _reference(LINES)
+    assert spy_blocks
+
+
+def test_plain_output_matches_text_path(tmp_path):
+    path = tmp_path / "tool.txt"
+    path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    assert first_token_names(path) == _reference(LINES)
@@ -0,0 +1,61 @@
+# tests/test_plugins.py
+import asyncio
+import http.server
+import json
+from urllib.parse import urlsplit, parse_qs
+
+from core.http_client import AsyncHTTPClient
+from core.plugins import run_plugins
+
+# 约 300KB，远大于一次 read 能拿到的缓冲
+ENTRIES = [{"name_value": f"h{i}.example.com\n*.w{i}.example.com"} for i in range(6000)]
+
+
+class _CrtSh(http.server.BaseHTTPRequestHandler):
+    """HTTP/1.0、无 Content-Length：响应体以关闭连接结束，分段写出"""
+    protocol_version = "HTTP/1.0"
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        if query.get("q") != ["%.example.com"] or query.get("output") != ["json"]:
+            self.send_response(400)
+            self.end_headers()
+            return
+        body = json.dumps(ENTRIES).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        for i in range(0, len(body), 4096):
+            self.wfile.write(body[i:i + 4096])
+            self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_close_delimited_body_is_read_to_eof(http_server):
+    port = http_server(_CrtSh)
+
+    async def fetch(max_body):
+        async with AsyncHTTPClient(timeout=5, max_body=max_body) as client:
+            return await client.get(f"http://127.0.0.1:{port}/", params={"q": "%.example.com", "output": "json"})
+
+    resp = asyncio.run(fetch(1 << 20))
+    assert not resp.truncated and len(resp.json()) == len(ENTRIES)
+    resp = asyncio.run(fetch(10000))
+    assert resp.truncated and len(resp.body) == 10000
+
+
+def test_crtsh_plugin(http_server):
+    port = http_server(_CrtSh)
+    cfg = {"entry": "core.sources.crtsh:enumerate", "rate_limit": 0, "base_url": f"http://127.0.0.1:{port}"}
+    subs, elapsed = run_plugins({"crtsh": cfg}, ["example.com"])["crtsh"]
+    assert len(subs) == 2 * len(ENTRIES)
+    assert {"h0.example.com", "w0.example.com"} <= subs
+
+
+def test_failing_plugin_reports_no_result(http_server):
+    port = http_server(_CrtSh)
+    cfg = {"entry": "core.sources.crtsh:enumerate", "rate_limit": 0, "base_url": f"http://127.0.0.1:{port}"}
+    subs, _ = run_plugins({"crtsh": cfg}, ["other.org"])["crtsh"]
+    assert subs is None
@@ -0,0 +1,20 @@
+# tests/test_progress.py
+from core.progress import _char_width, _truncate
+
+
+def _width(text):
+    return sum(_char_width(ch) for ch in text)
+
+
+def test_truncate_counts_wide_characters():
+    line = "⏳ [subfinder] 01:02 · 1234 条 | 合并 5000 | DNS 100/2000 · 命中 10 · ETA 00:38"
+    for width in (10, 31, 40, 60):
+        cut = _truncate(line, width)
+        assert _width(cut) <= width
+        assert cut.endswith("…")
+    # 只按字符数截断会超出终端宽度（中文、emoji 各占两列）
+    assert _width(line[:39] + "…") > 40
+
+
+def test_truncate_keeps_short_line():
+    assert _truncate("合并 12", 20) == "合并 12"
@@ -0,0 +1,100 @@
+# tests/test_resolvers.py
+import socket
+import struct
+import threading
+
+import pytest
+
+from core import resolvers
+from core.resolvers import build_query, parse_response, _read_name
+
+CANARY = "canary.test"
+CANARY_IP = "192.0.2.1"
+
+
+def _answer(data: bytes, rcode: int, ips: list) -> bytes:
+    _, end = _read_name(data, 12)
+    question = data[12:end + 4]
+    flags = 0x8180 | rcode
+    answers = b"".join(b"\xc0\x0c" + struct.pack(">HHIH", 1, 1, 60, 4) + socket.inet_aton(ip) for ip in ips)
+    return data[:2] + struct.pack(">HHHHH", flags, 1, len(ips), 0, 0) + question + answers
+
+
+def _serve(sock: socket.socket, mode: str):
+    while True:
+        try:
+            data, addr = sock.recvfrom(512)
+        except OSError:
+            return
+        name, _ = _read_name(data, 12)
+        if mode == "servfail":
+            sock.sendto(_answer(data, 2, []), addr)
+        elif name == CANARY:
+            sock.sendto(_answer(data, 0, ["203.0.113.66"] if mode == "poison" else [CANARY_IP]), addr)
+        elif mode == "hijack":
+            sock.sendto(_answer(data, 0, ["198.51.100.7"]), addr)
+        else:
+            sock.sendto(_answer(data, 3, []), addr)
+
+
+@pytest.fixture
+def dns_stubs():
+    """本地 UDP DNS 桩：{模式: 'IP:端口'}"""
+    sockets, addresses = [], {}
+    for mode in ("good", "hijack", "poison", "servfail"):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(("127.0.0.1", 0))
+        threading.Thread(target=_serve, args=(sock, mode), daemon=True).start()
+        sockets.append(sock)
+        addresses[mode] = f"127.0.0.1:{sock.getsockname()[1]}"
+    yield addresses
+    for sock in sockets:
+        sock.close()
+
+
+def _configure(tmp_path, candidates: list):
+    cand_file = tmp_path / "candidates.txt"
+    cand_file.write_text("\n".join(candidates) + "\n")
+    output = tmp_path / "ranked.txt"
+    resolvers.configure({"resolvers": {
+        "output": str(output),
+        "timeout": 0.5,
+        "rounds": 2,
+        "canaries": [f"{CANARY}={CANARY_IP}"],
+        "nx_domains": ["nx.test"],
+    }})
+    return cand_file, output
+
+
+def test_query_roundtrip():
+    query = build_query("www.example.com", "A", txid=0x1234)
+    txid, rcode, question, answers = parse_response(_answer(query, 0, ["192.0.2.9"]))
+    assert (txid, rcode, question, answers) == (0x1234, "NOERROR", "www.example.com", [("A", "192.0.2.9")])
+
+
+def test_bench_keeps_only_healthy_resolvers(tmp_path, dns_stubs):
+    cand_file, output = _configure(tmp_path, list(dns_stubs.values()) + ["not-an-ip"])
+    assert resolvers.run_benchmark(str(cand_file)) == 0
+    assert output.read_text().split() == [dns_stubs["good"]]
+
+    report = {line.split("\t")[0]: line.split("\t") for line in
+              (tmp_path / "ranked.txt.report.tsv").read_text().splitlines()[1:]}
+    assert report[dns_stubs["hijack"]][1] == "no" and report[dns_stubs["hijack"]][8] != "0"
+    assert report[dns_stubs["poison"]][1] == "no" and report[dns_stubs["poison"]][7] != "0"
+    assert report[dns_stubs["servfail"]][1] == "no"
+    assert resolvers.expand_template("dnsx -r {resolvers}") == f"dnsx -r {output}"
+
+
+def test_bench_without_healthy_resolvers_keeps_previous_file(tmp_path, dns_stubs):
+    cand_file, output = _configure(tmp_path, [dns_stubs["hijack"], dns_stubs["poison"]])
+    output.write_text("192.0.2.53\n")
+    assert resolvers.run_benchmark(str(cand_file)) == 1
+    assert output.read_text() == "192.0.2.53\n"
+    assert resolvers.template_value() == str(output)
+
+
+def test_missing_resolvers_file_is_an_error(tmp_path):
+    resolvers.configure({"resolvers": {"output": str(tmp_path / "missing.txt")}})
+    assert resolvers.expand_template("dnsx -silent") == "dnsx -silent"
+    with pytest.raises(ValueError):
+        resolvers.expand_template("dnsx -r {resolvers}")